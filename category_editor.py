@@ -67,19 +67,15 @@ class ExtensionScannerThread(QThread):
     def run(self):
         extensions = Counter()
         try:
-            if self.recursive:
-                files = list(self.folder_path.rglob("*"))
-            else:
-                files = list(self.folder_path.glob("*"))
+            files = list(file_organizer.iter_files(self.folder_path, self.recursive))
             
             total = len(files)
-            for i, f in enumerate(files):
+            for i, entry in enumerate(files):
                 if self._cancelled:
                     break
-                if f.is_file():
-                    ext = f.suffix.lower()
-                    if ext:
-                        extensions[ext] += 1
+                ext = file_organizer._split_name(entry.name)[1].lower()
+                if ext:
+                    extensions[ext] += 1
                 if i % 100 == 0:
                     self.progress.emit(i, total)
             
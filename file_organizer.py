@@ -1,17 +1,39 @@
+import atexit
+import errno
+import functools
 import logging
+import os
 import shutil
+import stat
+import sys
 import threading
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional, Callable, List, Set
+from typing import Dict, Optional, Callable, Iterator, List, Set, Tuple
 import platform
 import subprocess
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 logger = logging.getLogger("file_organizer")
 UNDO_LOG_FILE = Path("undo.log")
 CATEGORIES_FILE = Path("categories.json")
 
+# sendfile() accepts a regular file as the output only on Linux
+_USE_SENDFILE = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+_FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+# Windows and macOS volumes are case-insensitive by default
+if sys.platform in ("win32", "darwin"):
+    _name_key = str.lower
+else:
+    def _name_key(name: str) -> str:
+        return name
+
 DEFAULT_CATEGORIES: Dict[str, Set[str]] = {
     "Images": {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp", ".heic", ".svg", ".ico"},
     "Videos": {".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm", ".m4v", ".mpeg", ".mpg"},
@@ -71,25 +93,114 @@ def build_ext_index(categories: Dict[str, Set[str]]) -> Dict[str, str]:
     return idx
 
 
-def unique_path(path: Path) -> Path:
-    """Generates a unique path by appending (1), (2), etc."""
-    if not path.exists():
+def _split_name(name: str) -> Tuple[str, str]:
+    """Splits a file name into stem and suffix exactly like pathlib does."""
+    i = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[:i], name[i:]
+    return name, ""
+
+
+def _unique_path(path: str, exists: Callable[[str], bool] = os.path.exists) -> str:
+    """String version of unique_path used on the hot path."""
+    if not exists(path):
         return path
     
+    parent, name = os.path.split(path)
+    stem, suffix = _split_name(name)
     i = 1
-    stem, suffix = path.stem, path.suffix
-    parent = path.parent
     
     while True:
-        candidate = parent / f"{stem} ({i}){suffix}"
-        if not candidate.exists():
+        candidate = os.path.join(parent, f"{stem} ({i}){suffix}")
+        if not exists(candidate):
             return candidate
         i += 1
 
 
-def resolve_conflict(destination: Path, conflict_policy: str) -> Optional[Path]:
-    """Resolves file conflicts based on policy."""
-    if not destination.exists():
+def unique_path(path: Path) -> Path:
+    """Generates a unique path by appending (1), (2), etc."""
+    return Path(_unique_path(os.fspath(path)))
+
+
+class DestinationCache:
+    """Per-run memory of destination folder contents.
+    
+    Each destination folder is listed with a single scandir the first time a
+    file is sent there; later conflict checks are set lookups instead of
+    one stat per candidate name. The listing can go stale (files created by
+    others, case-insensitive or normalizing filesystems), so the name that is
+    finally handed out is always confirmed with one lexists on disk.
+    It also remembers which folders have been created so makedirs runs once
+    per folder instead of once per file.
+    """
+    
+    def __init__(self):
+        self._listings: Dict[str, Set[str]] = {}
+        self._made: Set[str] = set()
+        self._lock = threading.Lock()
+    
+    def _names(self, directory: str) -> Set[str]:
+        names = self._listings.get(directory)
+        if names is None:
+            try:
+                with os.scandir(directory) as it:
+                    names = {_name_key(entry.name) for entry in it}
+            except FileNotFoundError:
+                names = set()
+            self._listings[directory] = names
+        return names
+    
+    def _exists(self, path: str) -> bool:
+        directory, name = os.path.split(path)
+        return _name_key(name) in self._names(directory)
+    
+    def exists(self, path: str) -> bool:
+        with self._lock:
+            return self._exists(path)
+    
+    def add(self, path: str):
+        directory, name = os.path.split(path)
+        with self._lock:
+            self._names(directory).add(_name_key(name))
+    
+    def claim(self, path: str) -> bool:
+        """Records path as taken. Returns False if it was already taken in memory or on disk."""
+        directory, name = os.path.split(path)
+        key = _name_key(name)
+        with self._lock:
+            names = self._names(directory)
+            if key in names:
+                return False
+            names.add(key)
+            return not os.path.lexists(path)
+    
+    def claim_unique(self, path: str) -> str:
+        """Picks the first free "name (n)" variant of path and records it as taken."""
+        with self._lock:
+            while True:
+                candidate = _unique_path(path, self._exists)
+                directory, name = os.path.split(candidate)
+                self._names(directory).add(_name_key(name))
+                if not os.path.lexists(candidate):
+                    return candidate
+    
+    def ensure_dir(self, directory: str):
+        """Creates directory (and parents) the first time it is asked for."""
+        if directory in self._made:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._made.add(directory)
+
+
+def _resolve_conflict(destination: str, conflict_policy: str,
+                      dest_cache: Optional[DestinationCache] = None) -> Optional[str]:
+    """String version of resolve_conflict used on the hot path."""
+    if dest_cache is None:
+        exists = os.path.exists(destination)
+    else:
+        exists = not dest_cache.claim(destination)
+    if not exists:
         return destination
     
     if conflict_policy == "skip":
@@ -97,51 +208,234 @@ def resolve_conflict(destination: Path, conflict_policy: str) -> Optional[Path]:
         return None
     elif conflict_policy == "overwrite":
         try:
-            if destination.exists():
-                if destination.is_dir():
-                    shutil.rmtree(destination)
-                    logger.debug(f"Removed existing directory: {destination}")
-                else:
-                    destination.unlink(missing_ok=True)
-                    logger.debug(f"Removed existing file: {destination}")
+            if os.path.isdir(destination):
+                shutil.rmtree(destination)
+                logger.debug(f"Removed existing directory: {destination}")
+            else:
+                try:
+                    os.unlink(destination)
+                except FileNotFoundError:
+                    pass
+                logger.debug(f"Removed existing file: {destination}")
         except OSError as e:
             logger.warning(f"Could not remove existing file for overwrite: {destination} ({e})")
         return destination
     elif conflict_policy == "rename":
-        new_path = unique_path(destination)
+        if dest_cache is None:
+            new_path = _unique_path(destination)
+        else:
+            new_path = dest_cache.claim_unique(destination)
         logger.debug(f"Renamed to avoid conflict: {destination} -> {new_path}")
         return new_path
     else:
         raise ValueError(f"Unknown conflict policy: {conflict_policy}")
 
 
-def log_undo_operation(action: str, src: Path, dst: Path):
+def resolve_conflict(destination: Path, conflict_policy: str) -> Optional[Path]:
+    """Resolves file conflicts based on policy."""
+    final_dest = _resolve_conflict(os.fspath(destination), conflict_policy)
+    return None if final_dest is None else Path(final_dest)
+
+
+class UndoLog:
+    """Undo log writer that stays open for a whole run.
+    
+    Lines go through a 1 MB buffer and are fsynced every SYNC_EVERY entries
+    and on close, instead of opening and closing the file for every transfer.
+    The file is only created once the first entry is written.
+    Entries are assembled as bytes: action prefixes are pre-encoded and each
+    parent folder is resolved and encoded once per writer.
+    """
+    SYNC_EVERY = 10000
+    _PREFIXES = {"move": b"MOVE|", "copy": b"COPY|"}
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path if path is not None else UNDO_LOG_FILE
+        self.last_destination: Optional[str] = None
+        self._fp = None
+        self._pending = 0
+        self._dirs: Dict[str, Tuple[str, bytes]] = {}
+    
+    def _resolve(self, path) -> Tuple[str, bytes]:
+        """Returns the real path and its encoded form, resolving the parent folder once."""
+        head, tail = os.path.split(os.fspath(path))
+        cached = self._dirs.get(head)
+        if cached is None:
+            real_head = os.path.realpath(head)
+            cached = self._dirs[head] = (real_head, os.fsencode(os.path.join(real_head, "")))
+        return os.path.join(cached[0], tail), cached[1] + os.fsencode(tail)
+    
+    def write(self, action: str, src, dst):
+        _, src_b = self._resolve(src)
+        dst, dst_b = self._resolve(dst)
+        prefix = self._PREFIXES.get(action)
+        if prefix is None:
+            prefix = action.upper().encode("utf-8") + b"|"
+        if self._fp is None:
+            self._fp = open(self.path, "ab", buffering=1 << 20)
+        self._fp.write(prefix + src_b + b"|" + dst_b + b"\n")
+        self.last_destination = dst
+        self._pending += 1
+        if self._pending >= self.SYNC_EVERY:
+            self.sync()
+    
+    def sync(self):
+        """Flushes buffered entries and forces them to disk."""
+        if self._fp is None:
+            return
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        self._pending = 0
+    
+    def close(self):
+        if self._fp is None:
+            return
+        try:
+            self.sync()
+        finally:
+            self._fp.close()
+            self._fp = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Shared writer for transfers logged without an explicit UndoLog (opened lazily)
+_undo_log: Optional[UndoLog] = None
+_undo_log_lock = threading.Lock()
+
+
+def _shared_undo_log() -> UndoLog:
+    """Returns the shared writer, reopening it if UNDO_LOG_FILE was repointed."""
+    global _undo_log
+    with _undo_log_lock:
+        if _undo_log is None or _undo_log.path != UNDO_LOG_FILE:
+            if _undo_log is not None:
+                _undo_log.close()
+            _undo_log = UndoLog(UNDO_LOG_FILE)
+        return _undo_log
+
+
+def flush_undo_log():
+    """Writes out and closes the shared undo log writer. Call at the end of a run."""
+    global _undo_log
+    with _undo_log_lock:
+        if _undo_log is None:
+            return
+        try:
+            _undo_log.close()
+        except OSError as e:
+            logger.error(f"Could not flush undo log: {e}")
+        finally:
+            _undo_log = None
+
+
+atexit.register(flush_undo_log)
+
+
+def log_undo_operation(action: str, src, dst, undo_log: Optional[UndoLog] = None):
     """Logs a successful file transfer for potential rollback."""
     try:
-        with open(UNDO_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"{action.upper()}|{src.resolve()}|{dst.resolve()}\n")
+        if undo_log is None:
+            undo_log = _shared_undo_log()
+        undo_log.write(action, src, dst)
     except IOError as e:
         logger.error(f"Could not write to undo log: {e}")
 
 
-def do_transfer(src: Path, dst: Path, action: str, dry_run: bool) -> bool:
-    """Performs the file transfer with error handling."""
+def _try_reflink(src_fd: int, dst_fd: int) -> bool:
+    """Shares src_fd's data blocks with dst_fd on copy-on-write filesystems (Btrfs, XFS)."""
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError:
+        # EOPNOTSUPP/EXDEV/EINVAL etc: not a reflink-capable pair, copy the data instead
+        return False
+    return True
+
+
+def _sendfile_all(src_fd: int, dst_fd: int, size: int) -> bool:
+    """Copies src_fd into dst_fd inside the kernel. Returns False if sendfile is unsupported."""
+    count = min(max(size, 1 << 23), 1 << 30)
+    offset = 0
+    while True:
+        try:
+            sent = os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if offset == 0 and e.errno in (errno.EINVAL, errno.ENOSYS):
+                return False
+            raise
+        if sent == 0:
+            return True
+        offset += sent
+
+
+def _copy_file(src: str, dst: str) -> None:
+    """Copies data, permissions and timestamps like shutil.copy2.
+    
+    On Linux the data is reflinked when the filesystem supports it and
+    otherwise streamed with sendfile, so it never passes through Python.
+    """
+    if not _USE_SENDFILE:
+        shutil.copy2(src, dst)
+        return
+    
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        st = os.fstat(fsrc.fileno())
+        if not _try_reflink(fsrc.fileno(), fdst.fileno()):
+            if not _sendfile_all(fsrc.fileno(), fdst.fileno(), st.st_size):
+                shutil.copyfileobj(fsrc, fdst)
+    
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.chmod(dst, stat.S_IMODE(st.st_mode))
+
+
+def _move_file(src: str, dst: str) -> None:
+    """Moves a file with a single rename, copying only when crossing devices."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        if os.path.islink(src):
+            shutil.copy2(src, dst, follow_symlinks=False)
+        else:
+            _copy_file(src, dst)
+        os.unlink(src)
+
+
+def do_transfer(src, dst, action: str, dry_run: bool,
+                dest_cache: Optional[DestinationCache] = None,
+                undo_log: Optional[UndoLog] = None) -> bool:
+    """Performs the file transfer with error handling. Accepts str or Path."""
+    src, dst = os.fspath(src), os.fspath(dst)
     try:
-        dst.parent.mkdir(parents=True, exist_ok=True)
+        dest_dir = os.path.dirname(dst)
+        if dest_dir:
+            if dest_cache is None:
+                os.makedirs(dest_dir, exist_ok=True)
+            else:
+                dest_cache.ensure_dir(dest_dir)
         
         if dry_run:
-            logger.info(f"[DRY-RUN] {action.upper()}: {src} -> {dst}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"[DRY-RUN] {action.upper()}: {src} -> {dst}")
             return True
         
         if action == "move":
-            shutil.move(str(src), str(dst))
+            _move_file(src, dst)
         elif action == "copy":
-            shutil.copy2(str(src), str(dst))
+            _copy_file(src, dst)
         else:
             raise ValueError(f"Unknown action: {action}")
         
-        logger.info(f"{action.upper()} {src} -> {dst}")
-        log_undo_operation(action, src, dst)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"{action.upper()} {src} -> {dst}")
+        log_undo_operation(action, src, dst, undo_log)
         return True
     
     except PermissionError as e:
@@ -155,110 +449,109 @@ def do_transfer(src: Path, dst: Path, action: str, dry_run: bool) -> bool:
         return False
 
 
+def _place(src: str, dest_dir: str, name: str, kwargs: dict) -> Optional[bool]:
+    """Resolves conflicts for dest_dir/name and transfers src there."""
+    dest_cache = kwargs.get('dest_cache')
+    final_dest = _resolve_conflict(os.path.join(dest_dir, name), kwargs['conflict_policy'],
+                                   dest_cache)
+    if final_dest is None:
+        return None
+    return do_transfer(src, final_dest, kwargs['action'], kwargs['dry_run'], dest_cache,
+                       kwargs.get('undo_log'))
+
+
 def organize_by_type(file: Path, dest_root: Path, **kwargs) -> Optional[bool]:
     """Organizes file by extension category."""
     ext_index = kwargs.get("ext_index", {})
     skip_unknown = kwargs.get("skip_unknown", False)
     
-    file_ext = file.suffix.lower()
-    cat = ext_index.get(file_ext)
+    src = os.fspath(file)
+    name = os.path.basename(src)
+    cat = ext_index.get(_split_name(name)[1].lower())
     
     # إذا الامتداد غير مصنف
     if cat is None:
         if skip_unknown:
             # تخطي الملف
-            logger.info(f"SKIPPED (uncategorized): {file.name}")
+            logger.info(f"SKIPPED (uncategorized): {name}")
             return None
         else:
             # نقله لـ Others
             cat = "Others"
     
-    dest_file = dest_root / cat / file.name
-    final_dest = resolve_conflict(dest_file, kwargs['conflict_policy'])
-    if final_dest is None:
-        return None
-    return do_transfer(file, final_dest, kwargs['action'], kwargs['dry_run'])
+    return _place(src, os.path.join(os.fspath(dest_root), cat), name, kwargs)
 
 
 def organize_by_name(file: Path, dest_root: Path, **kwargs) -> Optional[bool]:
     """Organizes file into folder named after file stem."""
-    dest_file = dest_root / file.stem / file.name
-    final_dest = resolve_conflict(dest_file, kwargs['conflict_policy'])
-    if final_dest is None:
-        return None
-    return do_transfer(file, final_dest, kwargs['action'], kwargs['dry_run'])
+    src = os.fspath(file)
+    name = os.path.basename(src)
+    return _place(src, os.path.join(os.fspath(dest_root), _split_name(name)[0]), name, kwargs)
 
 
 def organize_by_date(file: Path, dest_root: Path, **kwargs) -> Optional[bool]:
     """Organizes file by year and month (YYYY/MM-MonthName)."""
+    src = os.fspath(file)
+    name = os.path.basename(src)
     try:
-        m_time = file.stat().st_mtime
+        m_time = os.stat(src).st_mtime
         date = datetime.fromtimestamp(m_time)
-        dest_dir = dest_root / str(date.year) / f"{date.month:02d}-{date.strftime('%B')}"
-        dest_file = dest_dir / file.name
-        final_dest = resolve_conflict(dest_file, kwargs['conflict_policy'])
-        if final_dest is None:
-            return None
-        return do_transfer(file, final_dest, kwargs['action'], kwargs['dry_run'])
+        dest_dir = os.path.join(os.fspath(dest_root), str(date.year), f"{date.month:02d}-{date.strftime('%B')}")
+        return _place(src, dest_dir, name, kwargs)
     except OSError as e:
-        logger.error(f"Could not access file metadata for {file.name}: {e}")
+        logger.error(f"Could not access file metadata for {name}: {e}")
         return False
     except Exception as e:
-        logger.error(f"Could not get date for {file.name}: {e}")
+        logger.error(f"Could not get date for {name}: {e}")
         return False
 
 
 def organize_by_day(file: Path, dest_root: Path, **kwargs) -> Optional[bool]:
     """Organizes files into YYYY/MM/DD structure."""
+    src = os.fspath(file)
+    name = os.path.basename(src)
     try:
-        m_time = file.stat().st_mtime
+        m_time = os.stat(src).st_mtime
         date = datetime.fromtimestamp(m_time)
-        dest_dir = dest_root / str(date.year) / f"{date.month:02d}" / f"{date.day:02d}"
-        dest_file = dest_dir / file.name
-        final_dest = resolve_conflict(dest_file, kwargs['conflict_policy'])
-        if final_dest is None:
-            return None
-        return do_transfer(file, final_dest, kwargs['action'], kwargs['dry_run'])
+        dest_dir = os.path.join(os.fspath(dest_root), str(date.year), f"{date.month:02d}", f"{date.day:02d}")
+        return _place(src, dest_dir, name, kwargs)
     except OSError as e:
-        logger.error(f"Could not access file metadata for {file.name}: {e}")
+        logger.error(f"Could not access file metadata for {name}: {e}")
         return False
     except Exception as e:
-        logger.error(f"Could not get date for {file.name}: {e}")
+        logger.error(f"Could not get date for {name}: {e}")
         return False
 
 
 def organize_by_size(file: Path, dest_root: Path, **kwargs) -> Optional[bool]:
     """Organizes file by size category."""
+    src = os.fspath(file)
+    name = os.path.basename(src)
     try:
-        size_mb = file.stat().st_size / (1024 * 1024)
+        size_mb = os.stat(src).st_size / (1024 * 1024)
         if size_mb < 1:
             cat = "Small (Under 1MB)"
         elif size_mb < 100:
             cat = "Medium (1-100MB)"
         else:
             cat = "Large (Over 100MB)"
-        dest_file = dest_root / cat / file.name
-        final_dest = resolve_conflict(dest_file, kwargs['conflict_policy'])
-        if final_dest is None:
-            return None
-        return do_transfer(file, final_dest, kwargs['action'], kwargs['dry_run'])
+        return _place(src, os.path.join(os.fspath(dest_root), cat), name, kwargs)
     except OSError as e:
-        logger.error(f"Could not get size for {file.name}: {e}")
+        logger.error(f"Could not get size for {name}: {e}")
         return False
     except Exception as e:
-        logger.error(f"Unexpected error processing {file.name}: {e}")
+        logger.error(f"Unexpected error processing {name}: {e}")
         return False
 
 
 def organize_by_first_letter(file: Path, dest_root: Path, **kwargs) -> Optional[bool]:
     """Organizes file by first letter of filename."""
-    first_letter = file.stem[0].upper() if file.stem else "#"
+    src = os.fspath(file)
+    name = os.path.basename(src)
+    stem = _split_name(name)[0]
+    first_letter = stem[0].upper() if stem else "#"
     cat = first_letter if first_letter.isalpha() else "#"
-    dest_file = dest_root / cat / file.name
-    final_dest = resolve_conflict(dest_file, kwargs['conflict_policy'])
-    if final_dest is None:
-        return None
-    return do_transfer(file, final_dest, kwargs['action'], kwargs['dry_run'])
+    return _place(src, os.path.join(os.fspath(dest_root), cat), name, kwargs)
 
 
 ORGANIZERS = {
@@ -271,34 +564,59 @@ ORGANIZERS = {
 }
 
 
-def list_files(source: Path, recursive: bool, exclude_dir: Optional[Path] = None) -> List[Path]:
-    """Optimized file listing with early exclusion and better error handling."""
-    pattern = source.rglob("*") if recursive else source.glob("*")
-    files: List[Path] = []
-    exclude_resolved = exclude_dir.resolve() if exclude_dir else None
+def _excluded_path(source: Path, exclude_dir: Path) -> Optional[str]:
+    """Spells exclude_dir the way scandir will report it while walking source."""
+    try:
+        rel = Path(exclude_dir).resolve().relative_to(Path(source).resolve())
+    except (ValueError, OSError, RuntimeError):
+        return None
+    return os.path.join(os.fspath(source), rel) if rel.parts else os.fspath(source)
+
+
+def iter_files(source: Path, recursive: bool, exclude_dir: Optional[Path] = None) -> Iterator[os.DirEntry]:
+    """Yields DirEntry objects for the files under source.
     
-    for p in pattern:
-        try:
-            if exclude_resolved:
-                try:
-                    p_resolved = p.resolve()
-                    if p_resolved == exclude_resolved or exclude_resolved in p_resolved.parents:
-                        continue
-                except (OSError, RuntimeError):
-                    continue
-            
-            if p.is_file():
-                files.append(p)
-        except (OSError, PermissionError) as e:
-            logger.warning(f"Could not access path {p}: {e}")
-        except Exception as e:
-            logger.warning(f"Unexpected error accessing {p}: {e}")
+    File types come from the directory listing itself, so no extra stat is
+    needed per entry. Only symlinks are stat'ed, to keep links to files;
+    symlinked directories are never walked and exclude_dir is pruned
+    without being walked.
+    """
+    root = os.fspath(source)
+    exclude = _excluded_path(source, exclude_dir) if exclude_dir else None
+    if exclude == root:
+        return
     
-    return files
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"Could not access path {current}: {e}")
+            continue
+        
+        for entry in entries:
+            try:
+                if entry.is_symlink():
+                    if entry.is_file():
+                        yield entry
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+                elif recursive and entry.is_dir(follow_symlinks=False) and entry.path != exclude:
+                    stack.append(entry.path)
+            except OSError as e:
+                logger.warning(f"Could not access path {entry.path}: {e}")
+
+
+def list_files(source: Path, recursive: bool, exclude_dir: Optional[Path] = None) -> List[Path]:
+    """Optimized file listing with early exclusion and better error handling."""
+    return [Path(entry.path) for entry in iter_files(source, recursive, exclude_dir)]
 
 
 def clear_undo_log():
     """Clears the undo log file."""
+    flush_undo_log()
     if UNDO_LOG_FILE.exists():
         try:
             UNDO_LOG_FILE.unlink()
@@ -309,6 +627,7 @@ def clear_undo_log():
 
 def perform_undo(on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
     """Reads the undo log and reverts the operations."""
+    flush_undo_log()
     if not UNDO_LOG_FILE.exists():
         logger.info("No undo log found. Nothing to revert.")
         if on_progress:
@@ -316,8 +635,8 @@ def perform_undo(on_progress: Optional[Callable[[int, int], None]] = None) -> Di
         return {"total": 0, "succeeded": 0, "failed": 0}
     
     try:
-        with open(UNDO_LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with open(UNDO_LOG_FILE, "rb") as f:
+            lines = [os.fsdecode(line) for line in f.read().splitlines()]
     except IOError as e:
         logger.error(f"Could not read undo log: {e}")
         return {"total": 0, "succeeded": 0, "failed": 0}
@@ -360,50 +679,65 @@ def perform_undo(on_progress: Optional[Callable[[int, int], None]] = None) -> Di
     return {"total": total, "succeeded": succeeded, "failed": failed}
 
 
+@functools.lru_cache(maxsize=None)
+def _system_dirs() -> Tuple[Tuple[Path, Path], ...]:
+    """Returns (path, resolved path) for the platform's existing system directories.
+    
+    Resolved once per process; validate_paths runs before every organize.
+    """
+    system_dirs = []
+    if platform.system() == "Windows":
+        system_dirs = [
+            Path.home() / "AppData",
+            Path("C:/Windows"),
+            Path("C:/Program Files"),
+            Path("C:/Program Files (x86)"),
+        ]
+    elif platform.system() == "Darwin":
+        system_dirs = [
+            Path("/System"),
+            Path("/Library"),
+            Path("/usr"),
+        ]
+    else:
+        system_dirs = [
+            Path("/usr"),
+            Path("/bin"),
+            Path("/sbin"),
+            Path("/etc"),
+        ]
+    
+    resolved = []
+    for sys_dir in system_dirs:
+        try:
+            if sys_dir.exists():
+                resolved.append((sys_dir, sys_dir.resolve()))
+        except Exception:
+            pass
+    return tuple(resolved)
+
+
 def validate_paths(source: Path, dest: Path) -> tuple[bool, str]:
     """Validates source and destination paths for security."""
     try:
         source = source.resolve()
         dest = dest.resolve()
         
-        system_dirs = []
-        if platform.system() == "Windows":
-            system_dirs = [
-                Path.home() / "AppData",
-                Path("C:/Windows"),
-                Path("C:/Program Files"),
-                Path("C:/Program Files (x86)"),
-            ]
-        elif platform.system() == "Darwin":
-            system_dirs = [
-                Path("/System"),
-                Path("/Library"),
-                Path("/usr"),
-            ]
-        else:
-            system_dirs = [
-                Path("/usr"),
-                Path("/bin"),
-                Path("/sbin"),
-                Path("/etc"),
-            ]
-        
-        for sys_dir in system_dirs:
-            try:
-                if sys_dir.exists():
-                    sys_dir_resolved = sys_dir.resolve()
-                    if dest == sys_dir_resolved or sys_dir_resolved in dest.parents:
-                        return False, f"Cannot organize into system directory: {sys_dir}"
-            except Exception:
-                pass
+        dest_parents = set(dest.parents)
+        for sys_dir, sys_dir_resolved in _system_dirs():
+            if dest == sys_dir_resolved or sys_dir_resolved in dest_parents:
+                return False, f"Cannot organize into system directory: {sys_dir}"
         
         if source == dest:
             return False, "Source and destination cannot be the same."
         
-        if not source.exists():
+        # One stat answers both "exists" and "is a directory"
+        try:
+            source_mode = os.stat(source).st_mode
+        except (FileNotFoundError, NotADirectoryError):
             return False, f"Source directory does not exist: {source}"
         
-        if not source.is_dir():
+        if not stat.S_ISDIR(source_mode):
             return False, f"Source is not a directory: {source}"
         
         return True, ""
@@ -454,24 +788,36 @@ def process_directory(**kwargs) -> Dict[str, int]:
     
     categories = kwargs.get('categories', load_categories())
     ext_index = build_ext_index(categories) if mode == "type" else {}
+    kwargs.setdefault('dest_cache', DestinationCache())
+    own_undo_log = kwargs.get('undo_log') is None
+    if own_undo_log:
+        kwargs['undo_log'] = UndoLog()
+    
+    cancel_event = kwargs.get('cancel_event')
+    cancel_is_set = cancel_event.is_set if cancel_event is not None else None
+    on_progress = kwargs.get('on_progress')
 
-    for idx, item in enumerate(files, start=1):
-        if kwargs.get('cancel_event') and kwargs['cancel_event'].is_set():
-            logger.info("Cancellation requested. Stopping...")
-            break
+    try:
+        for idx, item in enumerate(files, start=1):
+            if cancel_is_set is not None and cancel_is_set():
+                logger.info("Cancellation requested. Stopping...")
+                break
 
-        result = organizer_func(item, dest, ext_index=ext_index, **kwargs)
-        
-        processed += 1
-        if result is None:
-            skipped += 1
-        elif result:
-            succeeded += 1
-        else:
-            failed += 1
+            result = organizer_func(item, dest, ext_index=ext_index, **kwargs)
+            
+            processed += 1
+            if result is None:
+                skipped += 1
+            elif result:
+                succeeded += 1
+            else:
+                failed += 1
 
-        if 'on_progress' in kwargs:
-            kwargs['on_progress'](idx, total, item, result)
+            if on_progress is not None:
+                on_progress(idx, total, item, result)
+    finally:
+        if own_undo_log:
+            kwargs['undo_log'].close()
 
     return {
         "total": total,
@@ -482,17 +828,24 @@ def process_directory(**kwargs) -> Dict[str, int]:
     }
 
 
+def _pick_opener() -> Callable[[str], object]:
+    """Chooses the platform's "open with default application" command."""
+    system = platform.system()
+    if system == "Windows":
+        return os.startfile
+    if system == "Darwin":
+        return lambda path: subprocess.run(["open", path], check=True)
+    return lambda path: subprocess.run(["xdg-open", path], check=True)
+
+
+_OPENER = _pick_opener()
+
+
 def open_file_or_folder(path):
     """Opens file or folder in system default application (cross-platform)."""
     path = str(Path(path).resolve())
     try:
-        if platform.system() == "Windows":
-            import os
-            os.startfile(path)
-        elif platform.system() == "Darwin":
-            subprocess.run(["open", path], check=True)
-        else:
-            subprocess.run(["xdg-open", path], check=True)
+        _OPENER(path)
         return True
     except Exception as e:
         logger.error(f"Could not open {path}: {e}")
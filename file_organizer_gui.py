@@ -1,16 +1,17 @@
 import sys
 import json
 import logging
+import queue
 import threading
 from pathlib import Path
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QGroupBox,
     QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, QProgressBar,
-    QTextEdit, QFileDialog, QMessageBox, QTabWidget, QTableWidget, QTableWidgetItem,
+    QPlainTextEdit, QFileDialog, QMessageBox, QTabWidget, QTableView,
     QDialog, QListWidget, QListWidgetItem, QInputDialog, QMenu
 )
-from PySide6.QtCore import QThread, Signal, Slot, Qt, QTimer
+from PySide6.QtCore import QThread, Signal, Slot, Qt, QTimer, QAbstractTableModel, QModelIndex
 from PySide6.QtGui import QColor, QAction, QKeySequence, QActionGroup
 
 import qtawesome as qta
@@ -57,33 +58,25 @@ class QtLogHandler(logging.Handler):
         self.log_signal.emit(msg)
 
 
-def get_last_undo_destination() -> str:
-    """Efficiently reads the last line from undo log."""
-    try:
-        if not file_organizer.UNDO_LOG_FILE.exists() or file_organizer.UNDO_LOG_FILE.stat().st_size == 0:
-            return "N/A"
-        
-        with open(file_organizer.UNDO_LOG_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            if not lines:
-                return "N/A"
-            last_line = lines[-1].strip()
-            parts = last_line.split('|')
-            return parts[-1] if len(parts) == 3 else "N/A"
-    except Exception:
-        return "..."
+class QueueLogHandler(logging.Handler):
+    """Puts formatted records on the GUI event queue instead of emitting a signal each."""
+    def __init__(self, event_q: queue.Queue):
+        super().__init__()
+        self.event_q = event_q
+    
+    def emit(self, record):
+        self.event_q.put(("log", self.format(record)))
 
 
 class OrganizerWorker(QThread):
-    progress_updated = Signal(int, int)
-    result_logged = Signal(str, str, str, str)
+    """Runs the organizer; per-file results and logs go through event_q, not signals."""
     scan_finished = Signal(int)
     finished = Signal(dict, bool)
-    log_message = Signal(str)
     
-    def __init__(self, params: dict):
+    def __init__(self, params: dict, event_q: queue.Queue):
         super().__init__()
         self.params = params
+        self.event_q = event_q
     
     def run(self):
         try:
@@ -92,7 +85,7 @@ class OrganizerWorker(QThread):
             worker_logger.handlers.clear()
             worker_logger.propagate = False
             
-            handler = QtLogHandler(self.log_message)
+            handler = QueueLogHandler(self.event_q)
             handler.setFormatter(logging.Formatter("%(message)s"))
             worker_logger.addHandler(handler)
             
@@ -107,6 +100,7 @@ class OrganizerWorker(QThread):
                 self.params["dest"]
             )
             self.scan_finished.emit(len(files))
+            undo_log = file_organizer.UndoLog()
             
             def on_progress_callback(i, total, file, result):
                 if self.params['cancel_event'].is_set():
@@ -116,23 +110,27 @@ class OrganizerWorker(QThread):
                 status = status_map.get(result, "Unknown")
                 dest_path = "N/A"
                 
-                if status == "Success":
-                    dest_path = get_last_undo_destination()
+                if status == "Success" and undo_log.last_destination:
+                    dest_path = undo_log.last_destination
+                undo_log.last_destination = None
                 
-                self.result_logged.emit(str(file.resolve()), dest_path, file.name, status)
-                self.progress_updated.emit(i, total)
+                self.event_q.put(("result", (i, (str(file.resolve()), dest_path, file.name, status))))
             
             self.params['on_progress'] = on_progress_callback
             self.params['files'] = files
-            stats = file_organizer.process_directory(**self.params)
+            self.params['undo_log'] = undo_log
+            try:
+                stats = file_organizer.process_directory(**self.params)
+            finally:
+                undo_log.close()
             self.finished.emit(stats, self.params['cancel_event'].is_set())
         except InterruptedError:
-            self.log_message.emit("Operation cancelled by user.")
+            self.event_q.put(("log", "Operation cancelled by user."))
             self.finished.emit({"total": 0, "processed": 0, "succeeded": 0, "failed": 0, "skipped": 0}, True)
         except Exception as e:
-            self.log_message.emit(f"FATAL ERROR: {e}")
+            self.event_q.put(("log", f"FATAL ERROR: {e}"))
             import traceback
-            self.log_message.emit(traceback.format_exc())
+            self.event_q.put(("log", traceback.format_exc()))
             self.finished.emit({"total": 0, "processed": 0, "succeeded": 0, "failed": 0, "skipped": 0}, False)
     
     def cancel(self):
@@ -167,6 +165,72 @@ class UndoWorker(QThread):
         self.finished.emit(stats)
 
 
+class ResultsModel(QAbstractTableModel):
+    """Table model for organize results, stored as one plain tuple per row."""
+    STATUS_COLORS = {
+        "Success": QColor("#d4edda"),
+        "Failed": QColor("#f8d7da"),
+        "Skipped": QColor("#fff3cd"),
+    }
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []  # (src_path, dest_path, display_name, status)
+        self._headers = ["", "", ""]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        src_path, dest_path, display_name, status = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return display_name
+            if column == 1:
+                return dest_path if status == "Success" else "N/A"
+            return status
+        if role == Qt.UserRole:
+            if column == 0:
+                return src_path
+            if column == 1:
+                return dest_path
+        elif role == Qt.BackgroundRole and column == 2:
+            return self.STATUS_COLORS.get(status)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+    
+    def set_headers(self, labels):
+        self._headers = list(labels)
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self._headers) - 1)
+    
+    def append_batch(self, rows):
+        """Appends rows with a single insert notification."""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+    
+    def clear(self):
+        self.beginResetModel()
+        self._rows.clear()
+        self.endResetModel()
+    
+    def row_data(self, row):
+        return self._rows[row]
+
+
 class PathLineEdit(QLineEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -235,7 +299,7 @@ class FileOrganizerGUI(QMainWindow):
         self.undo_worker = None
         self.profiles = {}
         self.current_theme = "light"
-        self.results_buffer = []
+        self._event_q = queue.Queue()
         self.load_profiles()
         self._setup_combo_boxes()
         self._create_actions()
@@ -243,7 +307,7 @@ class FileOrganizerGUI(QMainWindow):
         self._create_menu_bar()
         self._create_tool_bar()
         self._create_status_bar()
-        self._setup_update_timer()
+        self._setup_drain_timer()
         self.connect_signals()
         self.load_settings()
         self.change_lang()
@@ -359,12 +423,13 @@ class FileOrganizerGUI(QMainWindow):
         # Tabs
         self.tabs = QTabWidget()
         main_layout.addWidget(self.tabs)
-        self.log_view = QTextEdit()
+        self.log_view = QPlainTextEdit()
         self.log_view.setReadOnly(True)
-        self.table_view = QTableWidget()
-        self.table_view.setColumnCount(3)
+        self.results_model = ResultsModel(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.results_model)
         self.table_view.setAlternatingRowColors(True)
-        self.table_view.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table_view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.table_view.setContextMenuPolicy(Qt.CustomContextMenu)
         self.table_view.customContextMenuRequested.connect(self._create_table_context_menu)
         self.tabs.addTab(self.log_view, qta.icon('fa5s.stream'), "")
@@ -422,28 +487,27 @@ class FileOrganizerGUI(QMainWindow):
         self.status_bar.addWidget(self.lbl_status, 1)
         self.status_bar.addPermanentWidget(self.progress)
     
-    def _setup_update_timer(self):
-        """Setup timer for batch table updates."""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self._flush_results_buffer)
-        self.update_timer.setInterval(100)
+    def _setup_drain_timer(self):
+        """Setup timer that drains worker events into the UI about once per frame."""
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setInterval(16)
+        self._drain_timer.timeout.connect(self._drain)
     
     def _create_table_context_menu(self, pos):
-        item = self.table_view.itemAt(pos)
-        if not item:
+        index = self.table_view.indexAt(pos)
+        if not index.isValid():
             return
+        _, dest_path, _, _ = self.results_model.row_data(index.row())
         menu = QMenu()
         open_file_action = menu.addAction(self.tr.t("open_file"))
         open_folder_action = menu.addAction(self.tr.t("open_folder"))
         action = menu.exec(self.table_view.mapToGlobal(pos))
         
         if action == open_file_action:
-            dest_path = self.table_view.item(item.row(), 1).data(Qt.UserRole)
             if dest_path and dest_path != "N/A" and Path(dest_path).is_file():
                 if not file_organizer.open_file_or_folder(dest_path):
                     QMessageBox.warning(self, self.tr.t("error"), f"Could not open file: {dest_path}")
         elif action == open_folder_action:
-            dest_path = self.table_view.item(item.row(), 1).data(Qt.UserRole)
             if dest_path and dest_path != "N/A":
                 folder = Path(dest_path).parent
                 if not file_organizer.open_file_or_folder(str(folder)):
@@ -453,7 +517,7 @@ class FileOrganizerGUI(QMainWindow):
         self.cmb_lang.currentTextChanged.connect(self.change_lang)
         self.btn_browse_source.clicked.connect(self.browse_source)
         self.btn_browse_dest.clicked.connect(self.browse_dest)
-        self.log_signal.connect(self.log_view.append)
+        self.log_signal.connect(self.log_view.appendPlainText)
         self.run_action.triggered.connect(self.run_organizer)
         self.cancel_action.triggered.connect(self.cancel_organizer)
         self.open_dest_action.triggered.connect(self.open_dest)
@@ -493,7 +557,7 @@ class FileOrganizerGUI(QMainWindow):
         self.cmb_conflict.setToolTip(self.tr.t("conflict_tooltip"))
         self.tabs.setTabText(0, self.tr.t("log"))
         self.tabs.setTabText(1, self.tr.t("results"))
-        self.table_view.setHorizontalHeaderLabels([self.tr.t("original_file"), self.tr.t("new_path"), self.tr.t("status")])
+        self.results_model.set_headers([self.tr.t("original_file"), self.tr.t("new_path"), self.tr.t("status")])
         self.run_action.setText(self.tr.t("run"))
         self.run_action.setToolTip(self.tr.t("run_tooltip"))
         self.cancel_action.setText(self.tr.t("cancel"))
@@ -543,48 +607,35 @@ class FileOrganizerGUI(QMainWindow):
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not apply theme: {e}")
 
-    @Slot(str, str, str, str)
-    def on_result_logged(self, src_path, dest_path, display_name, status):
-        """Buffers results instead of updating table immediately."""
-        self.results_buffer.append((src_path, dest_path, display_name, status))
-        if not self.update_timer.isActive():
-            self.update_timer.start()
-    
-    def _flush_results_buffer(self):
-        """Batch updates the table for better performance."""
-        if not self.results_buffer:
-            self.update_timer.stop()
-            return
-        
-        batch = self.results_buffer[:50]
-        self.results_buffer = self.results_buffer[50:]
-        
-        for src_path, dest_path, display_name, status in batch:
-            row = self.table_view.rowCount()
-            self.table_view.insertRow(row)
-            
-            item_name = QTableWidgetItem(display_name)
-            item_name.setData(Qt.UserRole, src_path)
-            
-            item_dest = QTableWidgetItem(dest_path if status == "Success" else "N/A")
-            item_dest.setData(Qt.UserRole, dest_path)
-            
-            status_item = QTableWidgetItem(status)
-            if status == "Success":
-                status_item.setBackground(QColor("#d4edda"))
-            elif status == "Failed":
-                status_item.setBackground(QColor("#f8d7da"))
-            elif status == "Skipped":
-                status_item.setBackground(QColor("#fff3cd"))
-            
-            self.table_view.setItem(row, 0, item_name)
-            self.table_view.setItem(row, 1, item_dest)
-            self.table_view.setItem(row, 2, status_item)
-        
+    @Slot(list)
+    def on_results_batch(self, rows):
+        """Appends a batch of result rows to the table with a single model insert."""
+        self.table_view.setUpdatesEnabled(False)
+        self.results_model.append_batch(rows)
+        self.table_view.setUpdatesEnabled(True)
         self.table_view.scrollToBottom()
+    
+    def _drain(self, limit=5000):
+        """Applies up to limit queued worker events: one table insert and one log append."""
+        rows, logs = [], []
+        progress = None
+        for _ in range(limit):
+            try:
+                kind, payload = self._event_q.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "result":
+                progress, row = payload
+                rows.append(row)
+            else:
+                logs.append(payload)
         
-        if not self.results_buffer:
-            self.update_timer.stop()
+        if logs:
+            self.log_view.appendPlainText("\n".join(logs))
+        if rows:
+            self.on_results_batch(rows)
+        if progress is not None:
+            self.progress.setValue(progress)
 
     def load_profiles(self):
         if not PROFILES_FILE.exists():
@@ -731,9 +782,8 @@ class FileOrganizerGUI(QMainWindow):
             return
         
         file_organizer.clear_undo_log()
-        self.table_view.setRowCount(0)
+        self.results_model.clear()
         self.log_view.clear()
-        self.results_buffer.clear()
         self.set_controls_enabled(False)
         self.lbl_status.setText(self.tr.t("scanning"))
         self.progress.setVisible(True)
@@ -754,32 +804,33 @@ class FileOrganizerGUI(QMainWindow):
         }
         
         self._last_dest = dest
-        self.organizer_worker = OrganizerWorker(params)
+        self.organizer_worker = OrganizerWorker(params, self._event_q)
         self.organizer_worker.scan_finished.connect(self.on_scan_finished)
-        self.organizer_worker.result_logged.connect(self.on_result_logged)
-        self.organizer_worker.progress_updated.connect(lambda i, t: self.progress.setValue(i))
         self.organizer_worker.finished.connect(self.on_worker_finished)
-        self.organizer_worker.log_message.connect(self.log_view.append)
+        self._drain_timer.start()
         self.organizer_worker.start()
 
     @Slot(int)
     def on_scan_finished(self, total):
         self.progress.setRange(0, total)
         self.lbl_status.setText(f"{self.tr.t('starting')} ({total} files found)")
-        self.table_view.setRowCount(0)
     
     @Slot(dict, bool)
     def on_worker_finished(self, stats, cancelled):
-        self._flush_results_buffer()
+        # The worker queued everything before emitting finished
+        self._drain_timer.stop()
+        while not self._event_q.empty():
+            self._drain()
+        summary = self.tr.t("summary").format(**stats)
         
         self.progress.setVisible(False)
         if not cancelled:
             self.lbl_status.setText(self.tr.t("done"))
             self.tabs.setCurrentIndex(1)
-            QMessageBox.information(self, self.tr.t("done"), self.tr.t("summary").format(**stats))
+            QMessageBox.information(self, self.tr.t("done"), summary)
         else:
             self.lbl_status.setText(self.tr.t("cancelled"))
-            QMessageBox.warning(self, self.tr.t("cancelled"), self.tr.t("summary").format(**stats))
+            QMessageBox.warning(self, self.tr.t("cancelled"), summary)
         
         self.organizer_worker = None
         self.set_controls_enabled(True)
@@ -806,7 +857,7 @@ class FileOrganizerGUI(QMainWindow):
             self.undo_worker = UndoWorker()
             self.undo_worker.progress_updated.connect(self.on_undo_progress)
             self.undo_worker.finished.connect(self.on_undo_finished)
-            self.undo_worker.log_message.connect(self.log_view.append)
+            self.undo_worker.log_message.connect(self.log_view.appendPlainText)
             self.undo_worker.start()
 
     @Slot(int, int)
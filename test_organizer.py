@@ -7,22 +7,58 @@ import logging
 import json
 import threading
 import tempfile
+import errno
+import types
+from concurrent.futures import ThreadPoolExecutor
 
 import file_organizer
 
+_DEFAULT_EXT_INDEX = file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+
+# نسخة واحدة للقراءة فقط من الفئات الافتراضية؛ أي تعديل عليها يفشل فوراً
+_CATEGORIES_PROXY = types.MappingProxyType(
+    {k: frozenset(v) for k, v in file_organizer.DEFAULT_CATEGORIES.items()}
+)
+
+# محتوى ملفات التصنيفات الجاهز للكتابة مباشرة كبايتات
+_CUSTOM_CATEGORIES_JSON = json.dumps({
+    "Custom": [".custom", ".test"],
+    "Another": [".xyz"]
+}).encode('utf-8')
+_INVALID_CATEGORIES_JSON = b"invalid json {{{"
+
+# حدث إلغاء مشترك لا يُعيَّن أبداً؛ الاختبار الذي يلغي فعلاً ينشئ حدثه الخاص
+_NEVER_CANCEL = threading.Event()
+
+# اسم ملف طويل (200 حرف) لاختبار الأسماء الطويلة
+_LONG_NAME = "a" * 200 + ".txt"
+
 
 # ═══════════════════════════════════════════════════════════════
 #                         FIXTURES
 # ═══════════════════════════════════════════════════════════════
 
 @pytest.fixture(autouse=True)
-def cleanup_undo_log():
-    """تنظيف ملف التراجع قبل وبعد كل اختبار"""
-    if file_organizer.UNDO_LOG_FILE.exists():
-        file_organizer.UNDO_LOG_FILE.unlink()
+def isolated_organizer_state(tmp_path, monkeypatch):
+    """
+    ملفا التصنيفات والتراجع لكل اختبار داخل مجلده المؤقت الخاص،
+    فلا تتشارك الاختبارات أي حالة ويمكن تشغيلها بالتوازي (pytest -n auto).
+    """
+    state_dir = tmp_path / "_state"
+    state_dir.mkdir()
+    monkeypatch.setattr(file_organizer, "CATEGORIES_FILE", state_dir / "categories.json")
+    monkeypatch.setattr(file_organizer, "UNDO_LOG_FILE", state_dir / "undo.log")
     yield
-    if file_organizer.UNDO_LOG_FILE.exists():
-        file_organizer.UNDO_LOG_FILE.unlink()
+    # إغلاق كاتب سجل التراجع المشترك قبل حذف المجلد المؤقت
+    file_organizer.flush_undo_log()
+
+
+# مجلد في الذاكرة (tmpfs) على Linux؛ ORGANIZER_TEST_REALFS=1 يعيد الاختبارات إلى القرص الحقيقي
+_SHM_DIR = "/dev/shm"
+_USE_SHM = os.path.isdir(_SHM_DIR) and not os.environ.get("ORGANIZER_TEST_REALFS")
+
+# دالة النسخ الحقيقية، محفوظة قبل أن يستبدلها hardlink_copies
+_real_copy_file = file_organizer._copy_file
 
 
 @pytest.fixture
@@ -30,47 +66,158 @@ def safe_tmp_path(tmp_path):
     """
     إنشاء مسار آمن للاختبارات يتجاوز فحص مجلدات النظام.
     على Windows، مجلد temp يكون داخل AppData لذلك نحتاج لتعديل الفحص.
+    على Linux يُنشأ المجلد في /dev/shm حتى تبقى عمليات الملفات في الذاكرة.
+    """
+    if not _USE_SHM:
+        yield tmp_path
+        return
+    path = Path(tempfile.mkdtemp(prefix="organizer_test_", dir=_SHM_DIR))
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# ملفات بيئة الاختبار: (المسار النسبي، المحتوى بالبايت أو الحجم لملف متفرق)
+TEST_TREE_SPEC = [
+    ("image.jpg", b""),
+    ("photo.png", b""),
+    ("document.pdf", b"old content"),
+    ("archive.zip", b""),
+    ("unknown.xyz", b""),
+    ("small_file.txt", b"small"),
+    ("medium_file.bin", 2 * 1024 * 1024),  # 2MB
+    ("Alpha.txt", b""),
+    ("Beta.doc", b""),
+    ("123_numeric.log", b""),
+    ("script.py", b"print('hello')"),
+    # مجلد فرعي مع ملفات
+    ("subfolder/nested_video.mp4", b""),
+    ("subfolder/nested_image.jpg", b""),
+    # مجلد فرعي متداخل
+    ("subfolder/deep/deep_file.txt", b""),
+]
+
+
+def _bulk_make_files(base: Path, spec):
+    """
+    إنشاء كل ملفات spec تحت base باستخدام os.open/os.write مباشرة.
+    المحتوى من نوع int يعني ملفاً متفرقاً بهذا الحجم (ftruncate بدلاً من كتابة أصفار).
+    على الأنظمة التي تدعم dir_fd تُفتح الملفات نسبةً لواصف المجلد.
+    """
+    base.mkdir(parents=True, exist_ok=True)
+    use_dir_fd = os.open in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+    dfd = os.open(base, os.O_RDONLY | os.O_DIRECTORY) if use_dir_fd else None
+    flags = os.O_CREAT | os.O_WRONLY | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    made_dirs = set()
+    try:
+        for rel, content in spec:
+            parent = os.path.dirname(rel)
+            if parent and parent not in made_dirs:
+                os.makedirs(base / parent, exist_ok=True)
+                made_dirs.add(parent)
+            if use_dir_fd:
+                fd = os.open(rel, flags, 0o644, dir_fd=dfd)
+            else:
+                fd = os.open(base / rel, flags, 0o644)
+            try:
+                if isinstance(content, int):
+                    os.ftruncate(fd, content)
+                elif content:
+                    os.write(fd, content)
+            finally:
+                os.close(fd)
+    finally:
+        if dfd is not None:
+            os.close(dfd)
+
+
+def _reflink_or_copy(src, dst):
+    """
+    دالة نسخ لـ copytree: reflink عند دعم نظام الملفات، وإلا نسخ عادي مع البيانات الوصفية.
+    الملف المتفرق بالكامل (مثل medium_file.bin) يُعاد إنشاؤه بـ ftruncate بدلاً من نسخ أصفاره.
     """
-    return tmp_path
+    st = os.stat(src)
+    if st.st_size and getattr(st, "st_blocks", None) == 0:
+        fd = os.open(dst, os.O_CREAT | os.O_WRONLY | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            os.ftruncate(fd, st.st_size)
+        finally:
+            os.close(fd)
+        shutil.copystat(src, dst)
+    else:
+        _real_copy_file(src, dst)
+    return dst
+
+
+def _link_or_copy(src, dst):
+    """رابط صلب إن أمكن (نفس نظام الملفات)، وإلا نسخ عادي"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+@pytest.fixture(scope="session")
+def proto_source(_template_tree):
+    """
+    مجلد مصدر نموذجي بملف واحد، يُربط منه في كل اختبار بدلاً من إعادة كتابته.
+    يُنشأ بجانب القالب حتى يكون على نفس نظام ملفات safe_tmp_path وتنجح الروابط الصلبة.
+    """
+    proto = _template_tree.parent / "proto_source"
+    proto.mkdir(exist_ok=True)
+    (proto / "test.txt").write_text("test content")
+    return proto
+
+
+@pytest.fixture(scope="session")
+def _template_tree(tmp_path_factory):
+    """بناء شجرة الاختبار مرة واحدة لكل الجلسة (على نفس نظام ملفات safe_tmp_path)"""
+    if not _USE_SHM:
+        template = tmp_path_factory.mktemp("template", numbered=False)
+        _bulk_make_files(template, TEST_TREE_SPEC)
+        yield template
+        return
+    base = Path(tempfile.mkdtemp(prefix="organizer_template_", dir=_SHM_DIR))
+    try:
+        _bulk_make_files(base / "template", TEST_TREE_SPEC)
+        yield base / "template"
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
 
 
 @pytest.fixture
-def test_environment(safe_tmp_path):
-    """إنشاء بيئة اختبار مع ملفات متنوعة"""
+def test_environment(safe_tmp_path, _template_tree):
+    """إنشاء بيئة اختبار مع ملفات متنوعة (نسخة من القالب المشترك)"""
     source_dir = safe_tmp_path / "source"
     dest_dir = safe_tmp_path / "dest"
-    source_dir.mkdir()
-    
-    # إنشاء ملفات اختبار متنوعة
-    (source_dir / "image.jpg").touch()
-    (source_dir / "photo.png").touch()
-    (source_dir / "document.pdf").write_text("old content")
-    (source_dir / "archive.zip").touch()
-    (source_dir / "unknown.xyz").touch()
-    (source_dir / "small_file.txt").write_text("small")
-    (source_dir / "medium_file.bin").write_bytes(b'\0' * (2 * 1024 * 1024))  # 2MB
-    (source_dir / "Alpha.txt").touch()
-    (source_dir / "Beta.doc").touch()
-    (source_dir / "123_numeric.log").touch()
-    (source_dir / "script.py").write_text("print('hello')")
-    
-    # إنشاء مجلد فرعي مع ملفات
-    sub_dir = source_dir / "subfolder"
-    sub_dir.mkdir()
-    (sub_dir / "nested_video.mp4").touch()
-    (sub_dir / "nested_image.jpg").touch()
-    
-    # إنشاء مجلد فرعي متداخل
-    deep_dir = sub_dir / "deep"
-    deep_dir.mkdir()
-    (deep_dir / "deep_file.txt").touch()
+    shutil.copytree(_template_tree, source_dir, copy_function=_reflink_or_copy)
     
     yield source_dir, dest_dir
 
 
+@pytest.fixture(scope="module")
+def shared_environment(_template_tree):
+    """
+    بيئة اختبار واحدة للقراءة فقط مشتركة بين اختبارات الوحدة (القالب نفسه).
+    لا تعدّل المصدر هنا؛ الاختبارات التي تضيف ملفات تستخدم ephemeral_env.
+    """
+    return _template_tree, _template_tree.parent / "shared_dest"
+
+
+@pytest.fixture
+def ephemeral_env(shared_environment, safe_tmp_path):
+    """نسخة من البيئة المشتركة بروابط صلبة لكل اختبار يضيف ملفات أو ينقلها دون الكتابة داخلها"""
+    source_dir = safe_tmp_path / "source"
+    dest_dir = safe_tmp_path / "dest"
+    shutil.copytree(shared_environment[0], source_dir, copy_function=_link_or_copy)
+    return source_dir, dest_dir
+
+
 @pytest.fixture
 def default_params(test_environment):
-    """معاملات افتراضية للاختبارات"""
+    """معاملات افتراضية للاختبارات (انسخ "categories" بـ dict() قبل تعديلها)"""
     source, dest = test_environment
     return {
         "source": source,
@@ -80,28 +227,144 @@ def default_params(test_environment):
         "recursive": False,
         "conflict_policy": "rename",
         "dry_run": False,
-        "categories": file_organizer.DEFAULT_CATEGORIES.copy(),
-        "cancel_event": threading.Event()
+        "categories": _CATEGORIES_PROXY,
+        "cancel_event": _NEVER_CANCEL
     }
 
 
+@pytest.fixture(scope="class")
+def organized_tree(tmp_path_factory, _template_tree):
+    """تنظيم شجرة الاختبار مرة واحدة لكل صنف اختبارات وإرجاع مجلد الوجهة"""
+    base = tmp_path_factory.mktemp("organized")
+    source, dest = base / "source", base / "dest"
+    shutil.copytree(_template_tree, source, copy_function=_reflink_or_copy)
+    with pytest.MonkeyPatch.context() as mp:
+        # ملفا التصنيفات والتراجع لهذا التشغيل يبقيان داخل المجلد المؤقت
+        mp.setattr(file_organizer, "CATEGORIES_FILE", base / "categories.json")
+        mp.setattr(file_organizer, "UNDO_LOG_FILE", base / "undo.log")
+        process_directory_test(
+            source=source,
+            dest=dest,
+            mode="type",
+            action="move",
+            recursive=False,
+            conflict_policy="rename",
+            dry_run=False,
+            categories=_CATEGORIES_PROXY
+        )
+        file_organizer.flush_undo_log()
+    return dest
+
+
+@pytest.fixture(scope="class")
+def listed(_template_tree):
+    """
+    قائمتا الملفات (بدون عودية، مع عودية) لشجرة القالب، تُحسبان مرة واحدة لكل صنف.
+    القالب لا يُعدَّل في اختبارات القوائم لذا يمكن مشاركته.
+    """
+    return (
+        _template_tree,
+        file_organizer.list_files(_template_tree, recursive=False),
+        file_organizer.list_files(_template_tree, recursive=True),
+    )
+
+
 @pytest.fixture
-def categories_file_backup():
-    """حفظ واستعادة ملف التصنيفات"""
-    backup = None
-    if file_organizer.CATEGORIES_FILE.exists():
-        backup = file_organizer.CATEGORIES_FILE.read_text(encoding='utf-8')
-    yield
-    if backup:
-        file_organizer.CATEGORIES_FILE.write_text(backup, encoding='utf-8')
-    elif file_organizer.CATEGORIES_FILE.exists():
-        file_organizer.CATEGORIES_FILE.unlink()
+def hardlink_copies(monkeypatch, safe_tmp_path):
+    """
+    إجراء "copy" ينشئ رابطاً صلباً بدلاً من نسخ البيانات، للاختبارات التي لا يهمها المحتوى.
+    إذا لم يدعم نظام الملفات الروابط الصلبة يبقى النسخ الحقيقي.
+    """
+    probe = safe_tmp_path / ".link_probe"
+    _fast_touch(probe)
+    try:
+        os.link(probe, safe_tmp_path / ".link_probe_2")
+    except (OSError, NotImplementedError):
+        return
+    finally:
+        for p in (probe, safe_tmp_path / ".link_probe_2"):
+            if p.exists():
+                p.unlink()
+    monkeypatch.setattr(file_organizer, "_copy_file", os.link)
 
 
 # ═══════════════════════════════════════════════════════════════
 #           HELPER FUNCTION - تجاوز فحص مجلدات النظام
 # ═══════════════════════════════════════════════════════════════
 
+def _snapshot_tree(root: Path) -> set:
+    """
+    لقطة واحدة لمحتويات المجلد: مجموعة المسارات النسبية (بفواصل /) لكل الملفات والمجلدات.
+    تغني عن استدعاء exists() لكل مسار على حدة.
+    """
+    snapshot = set()
+    if not root.exists():
+        return snapshot
+    stack = [(os.fspath(root), "")]
+    while stack:
+        current, prefix = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                rel = prefix + entry.name
+                snapshot.add(rel)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel + "/"))
+    return snapshot
+
+
+def _dir_contents(path: Path) -> set:
+    """أسماء محتويات مجلد بقراءة واحدة (مجموعة فارغة إذا لم يوجد)"""
+    try:
+        return set(os.listdir(path))
+    except FileNotFoundError:
+        return set()
+
+
+def _assert_has(parent: Path, *names):
+    """التحقق من وجود كل الأسماء في المجلد بقراءة واحدة له بدلاً من stat لكل اسم"""
+    contents = _dir_contents(parent)
+    missing = [name for name in names if name not in contents]
+    assert not missing, f"{missing} غير موجودة في {parent}"
+
+
+def _has_any_file(root: Path) -> bool:
+    """هل يحتوي المجلد (أو أي مجلد فرعي) على ملف؟ يتوقف عند أول ملف يجده."""
+    if not root.exists():
+        return False
+    stack = [os.fspath(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    return True
+    return False
+
+
+def _fast_touch(path):
+    """إنشاء ملف فارغ بـ os.open/os.close مباشرة دون stat إضافي من pathlib"""
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY | getattr(os, "O_CLOEXEC", 0), 0o644))
+
+
+def _make_dated_file(directory: Path, name: str, when: datetime.datetime) -> Path:
+    """إنشاء ملف فارغ وضبط تاريخ تعديله"""
+    path = directory / name
+    _fast_touch(path)
+    os.utime(path, (when.timestamp(), when.timestamp()))
+    return path
+
+
+def _same_path(a: Path, b: Path) -> bool:
+    """
+    مقارنة مسارين بدون resolve() عندما يكونان مطلقين وليسا روابط رمزية
+    (حال مسارات tmp_path)؛ وإلا نرجع إلى resolve().
+    """
+    if a.is_absolute() and b.is_absolute() and not a.is_symlink() and not b.is_symlink():
+        return os.path.normpath(a) == os.path.normpath(b)
+    return a.resolve() == b.resolve()
+
+
 def process_directory_test(**kwargs):
     """
     نسخة معدلة من process_directory للاختبارات تتجاوز فحص مجلدات النظام.
@@ -118,26 +381,39 @@ def process_directory_test(**kwargs):
     if not source.is_dir():
         return {"total": 0, "processed": 0, "succeeded": 0, "failed": 0, "skipped": 0, "error": "Source is not a directory"}
     
-    if source.resolve() == dest.resolve():
+    if _same_path(source, dest):
         return {"total": 0, "processed": 0, "succeeded": 0, "failed": 0, "skipped": 0, "error": "Same source and dest"}
     
     organizer_func = file_organizer.ORGANIZERS.get(mode)
     if not organizer_func:
         return {"total": 0, "processed": 0, "succeeded": 0, "failed": 0, "skipped": 0, "error": f"Unknown mode: {mode}"}
     
-    files = kwargs.get('files', file_organizer.list_files(source, kwargs['recursive'], exclude_dir=dest))
-    total = len(files)
-    
-    if total == 0:
-        return {"total": 0, "processed": 0, "succeeded": 0, "failed": 0, "skipped": 0}
-    
-    processed = succeeded = failed = skipped = 0
-    
-    categories = kwargs.get('categories', file_organizer.load_categories())
-    ext_index = file_organizer.build_ext_index(categories) if mode == "type" else {}
+    files = kwargs.get('files')
+    if files is None:
+        # بث الملفات مباشرة من os.scandir بدون بناء قائمة وسيطة؛ العدد الكلي يُعرف في النهاية
+        files = (Path(entry.path) for entry in
+                 file_organizer.iter_files(source, kwargs['recursive'], exclude_dir=dest))
+        total = None
+    else:
+        total = len(files)
+    
+    processed = succeeded = failed = skipped = seen = 0
+    
+    ext_index = kwargs.pop('ext_index', None)
+    if ext_index is None:
+        categories = kwargs.get('categories', file_organizer.load_categories())
+        ext_index = file_organizer.build_ext_index(categories) if mode == "type" else {}
+    # كل مجلد فئة يُنشأ مرة واحدة فقط في التشغيل بدلاً من makedirs لكل ملف
+    kwargs.setdefault('dest_cache', file_organizer.DestinationCache())
+    
+    # ربط ما يُستدعى في كل دورة بمتغيرات محلية قبل الحلقة
+    cancel_event = kwargs.get('cancel_event')
+    cancel_is_set = cancel_event.is_set if cancel_event is not None else None
+    on_progress = kwargs.get('on_progress')
 
     for idx, item in enumerate(files, start=1):
-        if kwargs.get('cancel_event') and kwargs['cancel_event'].is_set():
+        seen = idx
+        if cancel_is_set is not None and cancel_is_set():
             break
 
         result = organizer_func(item, dest, ext_index=ext_index, **kwargs)
@@ -150,11 +426,11 @@ def process_directory_test(**kwargs):
         else:
             failed += 1
 
-        if 'on_progress' in kwargs:
-            kwargs['on_progress'](idx, total, item, result)
+        if on_progress is not None:
+            on_progress(idx, total if total is not None else idx, item, result)
 
     return {
-        "total": total,
+        "total": total if total is not None else seen,
         "processed": processed,
         "succeeded": succeeded,
         "failed": failed,
@@ -169,7 +445,7 @@ def process_directory_test(**kwargs):
 class TestCategoryManagement:
     """اختبارات إدارة التصنيفات"""
     
-    def test_load_default_categories(self, categories_file_backup):
+    def test_load_default_categories(self):
         """اختبار تحميل التصنيفات الافتراضية"""
         if file_organizer.CATEGORIES_FILE.exists():
             file_organizer.CATEGORIES_FILE.unlink()
@@ -182,70 +458,55 @@ class TestCategoryManagement:
         assert ".jpg" in categories["Images"]
         assert ".mp4" in categories["Videos"]
     
-    def test_load_custom_categories(self, safe_tmp_path, categories_file_backup):
+    def test_load_custom_categories(self, safe_tmp_path):
         """اختبار تحميل تصنيفات مخصصة"""
-        custom_categories = {
-            "Custom": [".custom", ".test"],
-            "Another": [".xyz"]
-        }
-        
-        file_organizer.CATEGORIES_FILE.write_text(
-            json.dumps(custom_categories),
-            encoding='utf-8'
-        )
+        file_organizer.CATEGORIES_FILE.write_bytes(_CUSTOM_CATEGORIES_JSON)
         
         categories = file_organizer.load_categories()
         
         assert "Custom" in categories
         assert ".custom" in categories["Custom"]
     
-    def test_load_invalid_categories_file(self, categories_file_backup):
+    def test_load_invalid_categories_file(self):
         """اختبار التعامل مع ملف تصنيفات تالف"""
-        file_organizer.CATEGORIES_FILE.write_text("invalid json {{{", encoding='utf-8')
+        file_organizer.CATEGORIES_FILE.write_bytes(_INVALID_CATEGORIES_JSON)
         
         categories = file_organizer.load_categories()
         
         # يجب أن يعود للافتراضي
         assert "Images" in categories
     
-    def test_build_ext_index(self):
+    @pytest.mark.parametrize("categories,expected_index,expect_warning", [
+        (
+            {"Images": {".jpg", ".png"}, "Documents": {".pdf", ".txt"}},
+            {".jpg": "Images", ".png": "Images", ".pdf": "Documents", ".txt": "Documents"},
+            False,
+        ),
+        # الفهرس غير حساس لحالة الأحرف
+        ({"Images": {".JPG", ".PNG"}}, {".jpg": "Images", ".png": "Images"}, False),
+        # امتداد مكرر: يُستخدم أول ظهور
+        ({"Images": {".jpg"}, "Photos": {".jpg"}}, {".jpg": "Images"}, True),
+    ], ids=["basic", "case_insensitive", "duplicate_detection"])
+    def test_build_ext_index(self, caplog, categories, expected_index, expect_warning):
         """اختبار بناء فهرس الامتدادات"""
-        categories = {
-            "Images": {".jpg", ".png"},
-            "Documents": {".pdf", ".txt"}
-        }
-        
-        index = file_organizer.build_ext_index(categories)
-        
-        assert index[".jpg"] == "Images"
-        assert index[".png"] == "Images"
-        assert index[".pdf"] == "Documents"
-        assert index[".txt"] == "Documents"
-        assert len(index) == 4
-    
-    def test_build_ext_index_case_insensitive(self):
-        """اختبار أن الفهرس غير حساس لحالة الأحرف"""
-        categories = {
-            "Images": {".JPG", ".PNG"},
-        }
-        
-        index = file_organizer.build_ext_index(categories)
+        with caplog.at_level(logging.WARNING):
+            index = file_organizer.build_ext_index(categories)
         
-        assert ".jpg" in index
-        assert ".png" in index
+        assert index == expected_index
+        assert ("Duplicate extensions detected" in caplog.text) == expect_warning
     
-    def test_build_ext_index_duplicate_detection(self, caplog):
-        """اختبار اكتشاف الامتدادات المكررة"""
-        categories = {
-            "Images": {".jpg"},
-            "Photos": {".jpg"}  # مكرر
-        }
-        
+    def test_build_ext_index_fresh_each_call(self, caplog):
+        """اختبار أن كل استدعاء يعيد قاموساً جديداً ويكرر تحذير التكرار"""
+        categories = {"Images": {".jpg"}, "Photos": {".jpg"}, "Docs": {".pdf"}}
         with caplog.at_level(logging.WARNING):
-            index = file_organizer.build_ext_index(categories)
+            first = file_organizer.build_ext_index(categories)
+            first[".evil"] = "X"
+            second = file_organizer.build_ext_index(categories)
         
-        assert "Duplicate extensions detected" in caplog.text
-        assert ".jpg" in index
+        assert first is not second
+        assert ".evil" not in second
+        assert caplog.text.count("Duplicate extensions detected") == 2
+        assert file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES) == _DEFAULT_EXT_INDEX
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -272,9 +533,9 @@ class TestPathValidation:
         
         assert not source.exists()
     
-    def test_source_is_file_direct(self, test_environment):
+    def test_source_is_file_direct(self, shared_environment):
         """اختبار أن الملف ليس مجلد - اختبار مباشر"""
-        source, dest = test_environment
+        source, dest = shared_environment
         file_path = source / "image.jpg"
         
         assert file_path.exists()
@@ -292,6 +553,35 @@ class TestPathValidation:
         
         # قد يفشل بسبب AppData أولاً، لكن المنطق صحيح
         assert valid is False
+    
+    @pytest.mark.parametrize("make_source,expected", [
+        (lambda base: base / "missing", "does not exist"),
+        (lambda base: base / "afile", "is not a directory"),
+        (lambda base: base / "afile" / "sub", "does not exist"),
+    ], ids=["missing", "file", "through_file"])
+    def test_validate_paths_source_errors(self, safe_tmp_path, make_source, expected):
+        """اختبار رسائل validate_paths لمصدر غير موجود أو ليس مجلداً (بـ stat واحد)"""
+        dest = safe_tmp_path / "dest"
+        if not file_organizer.validate_paths(safe_tmp_path, dest)[0]:
+            pytest.skip("المجلد المؤقت داخل مجلد نظام (AppData على Windows)")
+        _fast_touch(safe_tmp_path / "afile")
+        
+        valid, error = file_organizer.validate_paths(make_source(safe_tmp_path), dest)
+        
+        assert valid is False
+        assert expected in error
+    
+    def test_validate_paths_rejects_system_dir(self, safe_tmp_path):
+        """اختبار رفض الوجهة داخل مجلد نظام (القائمة تُحل مرة واحدة فقط)"""
+        system_dirs = file_organizer._system_dirs()
+        if not system_dirs:
+            pytest.skip("لا توجد مجلدات نظام على هذا الجهاز")
+        
+        valid, error = file_organizer.validate_paths(safe_tmp_path, system_dirs[0][0] / "organized")
+        
+        assert valid is False
+        assert "system directory" in error
+        assert file_organizer._system_dirs() is system_dirs
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -301,39 +591,16 @@ class TestPathValidation:
 class TestOrganizeByType:
     """اختبارات التنظيم حسب النوع"""
     
-    def test_organize_images(self, default_params):
-        """اختبار تنظيم الصور"""
-        source = default_params["source"]
-        dest = default_params["dest"]
-        
-        result = process_directory_test(**default_params)
-        
-        assert (dest / "Images" / "image.jpg").exists()
-        assert (dest / "Images" / "photo.png").exists()
-    
-    def test_organize_documents(self, default_params):
-        """اختبار تنظيم المستندات"""
-        dest = default_params["dest"]
-        
-        process_directory_test(**default_params)
-        
-        assert (dest / "Documents" / "document.pdf").exists()
-    
-    def test_organize_unknown_extension(self, default_params):
-        """اختبار الامتدادات غير المعروفة"""
-        dest = default_params["dest"]
-        
-        process_directory_test(**default_params)
-        
-        assert (dest / "Others" / "unknown.xyz").exists()
-    
-    def test_organize_code_files(self, default_params):
-        """اختبار تنظيم ملفات الكود"""
-        dest = default_params["dest"]
-        
-        process_directory_test(**default_params)
-        
-        assert (dest / "Code" / "script.py").exists()
+    @pytest.mark.parametrize("rel", [
+        "Images/image.jpg",
+        "Images/photo.png",
+        "Documents/document.pdf",
+        "Others/unknown.xyz",  # امتداد غير معروف
+        "Code/script.py",
+    ])
+    def test_organized(self, organized_tree, rel):
+        """اختبار وصول كل ملف إلى مجلد فئته (تشغيل واحد مشترك)"""
+        assert (organized_tree / rel).exists()
     
     def test_non_recursive(self, default_params):
         """اختبار عدم شمول المجلدات الفرعية"""
@@ -344,8 +611,8 @@ class TestOrganizeByType:
         result = process_directory_test(**default_params)
         
         # الملفات في المجلد الفرعي يجب أن تبقى
-        assert (source / "subfolder" / "nested_video.mp4").exists()
-        assert not (dest / "Videos" / "nested_video.mp4").exists()
+        assert "nested_video.mp4" in _dir_contents(source / "subfolder")
+        assert "nested_video.mp4" not in _dir_contents(dest / "Videos")
     
     def test_recursive(self, default_params):
         """اختبار شمول المجلدات الفرعية"""
@@ -355,8 +622,8 @@ class TestOrganizeByType:
         
         result = process_directory_test(**default_params)
         
-        assert (dest / "Videos" / "nested_video.mp4").exists()
-        assert (dest / "Images" / "nested_image.jpg").exists()
+        assert "nested_video.mp4" in _dir_contents(dest / "Videos")
+        assert "nested_image.jpg" in _dir_contents(dest / "Images")
         assert result["succeeded"] >= 13
 
 
@@ -411,7 +678,7 @@ class TestOrganizeByDate:
         source, dest = safe_tmp_path / "source", safe_tmp_path / "dest"
         source.mkdir()
         test_file = source / "file_from_past.txt"
-        test_file.touch()
+        _fast_touch(test_file)
         
         # تعيين تاريخ محدد
         past_date = datetime.datetime(2023, 10, 26)
@@ -437,13 +704,13 @@ class TestOrganizeByDate:
         
         # ملف من يناير
         jan_file = source / "january.txt"
-        jan_file.touch()
+        _fast_touch(jan_file)
         jan_date = datetime.datetime(2024, 1, 15)
         os.utime(jan_file, (jan_date.timestamp(), jan_date.timestamp()))
         
         # ملف من ديسمبر
         dec_file = source / "december.txt"
-        dec_file.touch()
+        _fast_touch(dec_file)
         dec_date = datetime.datetime(2024, 12, 25)
         os.utime(dec_file, (dec_date.timestamp(), dec_date.timestamp()))
         
@@ -466,7 +733,7 @@ class TestOrganizeByDay:
         source, dest = safe_tmp_path / "source", safe_tmp_path / "dest"
         source.mkdir()
         test_file = source / "file_specific.log"
-        test_file.touch()
+        _fast_touch(test_file)
         
         test_date = datetime.datetime(2025, 10, 16)
         m_time = test_date.timestamp()
@@ -491,16 +758,19 @@ class TestOrganizeByDay:
         source.mkdir()
         
         test_date = datetime.datetime(2025, 5, 20)
+        file_count = 3
         
-        for i in range(3):
-            f = source / f"file_{i}.txt"
-            f.touch()
-            os.utime(f, (test_date.timestamp(), test_date.timestamp()))
+        # إنشاء الملفات وضبط تواريخها بالتوازي (os.utime يحرر الـ GIL)
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            files = list(ex.map(lambda i: _make_dated_file(source, f"file_{i}.txt", test_date),
+                                range(file_count)))
+        
+        for f in files:
             file_organizer.organize_by_day(f, dest, action="move", conflict_policy="rename", dry_run=False)
         
         day_folder = dest / "2025" / "05" / "20"
         assert day_folder.exists()
-        assert len(list(day_folder.glob("*.txt"))) == 3
+        assert len(list(day_folder.glob("*.txt"))) == file_count
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -544,10 +814,15 @@ class TestOrganizeBySize:
         source.mkdir()
         
         large_file = source / "large_file.bin"
-        # إنشاء ملف أكبر من 100MB (نستخدم sparse file)
-        with open(large_file, 'wb') as f:
-            f.seek(101 * 1024 * 1024)  # 101MB
-            f.write(b'\0')
+        size = 101 * 1024 * 1024  # 101MB
+        # ملف متفرق أكبر من 100MB: ftruncate لا يخصص أي كتل بيانات
+        fd = os.open(large_file, os.O_CREAT | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            os.ftruncate(fd, size)
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, size, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
         
         file_organizer.organize_by_size(
             large_file,
@@ -600,8 +875,8 @@ class TestOrganizeByFirstLetter:
         source, dest = safe_tmp_path / "source", safe_tmp_path / "dest"
         source.mkdir()
         
-        (source / "apple.txt").touch()
-        (source / "AVOCADO.txt").touch()
+        _fast_touch(source / "apple.txt")
+        _fast_touch(source / "AVOCADO.txt")
         
         file_organizer.organize_by_first_letter(source / "apple.txt", dest, action="move", conflict_policy="rename", dry_run=False)
         file_organizer.organize_by_first_letter(source / "AVOCADO.txt", dest, action="move", conflict_policy="rename", dry_run=False)
@@ -614,6 +889,7 @@ class TestOrganizeByFirstLetter:
 #                    CONFLICT POLICY TESTS
 # ═══════════════════════════════════════════════════════════════
 
+@pytest.mark.usefixtures("hardlink_copies")
 class TestConflictPolicies:
     """اختبارات سياسات التعارض"""
     
@@ -622,9 +898,9 @@ class TestConflictPolicies:
         source, dest = test_environment
         dest_docs_dir = dest / "Documents"
         dest_docs_dir.mkdir(parents=True)
-        (dest_docs_dir / "document.pdf").touch()
+        _fast_touch(dest_docs_dir / "document.pdf")
         
-        ext_index = file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+        ext_index = _DEFAULT_EXT_INDEX
         
         file_organizer.organize_by_type(
             source / "document.pdf",
@@ -645,11 +921,11 @@ class TestConflictPolicies:
         dest_docs_dir.mkdir(parents=True)
         
         # إنشاء ملفات موجودة مسبقاً
-        (dest_docs_dir / "document.pdf").touch()
-        (dest_docs_dir / "document (1).pdf").touch()
-        (dest_docs_dir / "document (2).pdf").touch()
+        _fast_touch(dest_docs_dir / "document.pdf")
+        _fast_touch(dest_docs_dir / "document (1).pdf")
+        _fast_touch(dest_docs_dir / "document (2).pdf")
         
-        ext_index = file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+        ext_index = _DEFAULT_EXT_INDEX
         
         file_organizer.organize_by_type(
             source / "document.pdf",
@@ -662,6 +938,60 @@ class TestConflictPolicies:
         
         assert (dest_docs_dir / "document (3).pdf").exists()
     
+    def test_rename_with_destination_cache(self, test_environment):
+        """اختبار إعادة التسمية باستخدام ذاكرة محتويات الوجهة"""
+        source, dest = test_environment
+        dest_docs_dir = dest / "Documents"
+        dest_docs_dir.mkdir(parents=True)
+        _fast_touch(dest_docs_dir / "document.pdf")
+        
+        ext_index = _DEFAULT_EXT_INDEX
+        dest_cache = file_organizer.DestinationCache()
+        
+        # نسخ نفس الملف مرتين: يجب أن تتذكر الذاكرة الأسماء المحجوزة
+        for _ in range(2):
+            file_organizer.organize_by_type(
+                source / "document.pdf",
+                dest,
+                action="copy",
+                conflict_policy="rename",
+                dry_run=False,
+                ext_index=ext_index,
+                dest_cache=dest_cache
+            )
+        
+        assert (dest_docs_dir / "document (1).pdf").exists()
+        assert (dest_docs_dir / "document (2).pdf").exists()
+        assert dest_cache.exists(str(dest_docs_dir / "document (2).pdf"))
+    
+    def test_rename_when_destination_cache_is_stale(self, safe_tmp_path):
+        """اختبار أن ملفاً أُنشئ بعد قراءة مجلد الوجهة لا يُستبدل أبداً"""
+        source, dest = safe_tmp_path / "source", safe_tmp_path / "dest"
+        source.mkdir()
+        dest_docs_dir = dest / "Documents"
+        dest_cache = file_organizer.DestinationCache()
+        
+        for name in ("first.txt", "x.txt"):
+            (source / name).write_text("mine")
+        
+        # أول ملف يجعل الذاكرة تقرأ مجلد الوجهة
+        file_organizer.organize_by_type(
+            source / "first.txt", dest, action="move", conflict_policy="rename",
+            dry_run=False, ext_index=_DEFAULT_EXT_INDEX, dest_cache=dest_cache
+        )
+        # ملف يظهر بعد القراءة (برنامج آخر، أو نظام ملفات لا يميز حالة الأحرف)
+        (dest_docs_dir / "x.txt").write_text("IMPORTANT existing file")
+        (dest_docs_dir / "x (1).txt").write_text("IMPORTANT too")
+        
+        file_organizer.organize_by_type(
+            source / "x.txt", dest, action="move", conflict_policy="rename",
+            dry_run=False, ext_index=_DEFAULT_EXT_INDEX, dest_cache=dest_cache
+        )
+        
+        assert (dest_docs_dir / "x.txt").read_text() == "IMPORTANT existing file"
+        assert (dest_docs_dir / "x (1).txt").read_text() == "IMPORTANT too"
+        assert (dest_docs_dir / "x (2).txt").read_text() == "mine"
+    
     def test_skip_policy(self, test_environment):
         """اختبار سياسة التخطي"""
         source, dest = test_environment
@@ -669,7 +999,7 @@ class TestConflictPolicies:
         dest_docs_dir.mkdir(parents=True)
         (dest_docs_dir / "document.pdf").write_text("original")
         
-        ext_index = file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+        ext_index = _DEFAULT_EXT_INDEX
         
         result = file_organizer.organize_by_type(
             source / "document.pdf",
@@ -690,7 +1020,7 @@ class TestConflictPolicies:
         dest_docs_dir.mkdir(parents=True)
         (dest_docs_dir / "document.pdf").write_text("original")
         
-        ext_index = file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+        ext_index = _DEFAULT_EXT_INDEX
         
         file_organizer.organize_by_type(
             source / "document.pdf",
@@ -708,6 +1038,7 @@ class TestConflictPolicies:
 #                    ACTION TESTS (MOVE/COPY)
 # ═══════════════════════════════════════════════════════════════
 
+@pytest.mark.usefixtures("hardlink_copies")
 class TestActions:
     """اختبارات الإجراءات (نقل/نسخ)"""
     
@@ -723,7 +1054,7 @@ class TestActions:
             action="move",
             conflict_policy="rename",
             dry_run=False,
-            ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+            ext_index=_DEFAULT_EXT_INDEX
         )
         
         assert not original_file.exists()
@@ -740,7 +1071,7 @@ class TestActions:
             action="copy",
             conflict_policy="rename",
             dry_run=False,
-            ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+            ext_index=_DEFAULT_EXT_INDEX
         )
         
         assert original_file.exists()  # الأصلي يبقى
@@ -770,7 +1101,7 @@ class TestDryRun:
         assert (source / "subfolder" / "nested_video.mp4").exists()
         
         # لا يجب نقل أي ملفات فعلياً
-        assert not any(dest.rglob("*.*")) if dest.exists() else True
+        assert not _has_any_file(dest)
         
         # رسالة DRY-RUN يجب أن تظهر
         assert "[DRY-RUN]" in caplog.text
@@ -802,14 +1133,14 @@ class TestUndo:
         process_directory_test(**default_params)
         
         # التأكد من نقل الملفات
-        assert (dest / "Images" / "image.jpg").exists()
-        assert not (source / "image.jpg").exists()
+        assert "Images/image.jpg" in _snapshot_tree(dest)
+        assert "image.jpg" not in _snapshot_tree(source)
         
         # تنفيذ التراجع
         stats = file_organizer.perform_undo()
         
         # التأكد من إعادة الملفات
-        assert (source / "image.jpg").exists()
+        assert "image.jpg" in _snapshot_tree(source)
         assert stats["succeeded"] > 0
     
     def test_undo_empty_log(self):
@@ -832,7 +1163,7 @@ class TestUndo:
         process_directory_test(**default_params)
         
         # حذف بعض الملفات من الوجهة
-        if (dest / "Images" / "image.jpg").exists():
+        if "Images/image.jpg" in _snapshot_tree(dest):
             (dest / "Images" / "image.jpg").unlink()
         
         # تنفيذ التراجع
@@ -873,25 +1204,31 @@ class TestEdgeCases:
             recursive=False,
             conflict_policy="rename",
             dry_run=False,
-            cancel_event=threading.Event()
+            cancel_event=_NEVER_CANCEL
         )
         
         assert result["total"] == 0
         assert result["succeeded"] == 0
     
-    def test_exclude_destination_folder(self, test_environment):
+    def test_exclude_destination_folder(self, ephemeral_env):
         """اختبار استثناء مجلد الوجهة"""
-        source, dest = test_environment
+        source, dest = ephemeral_env
         
         # إنشاء مجلد وجهة داخل المصدر
         internal_dest = source / "organized"
         internal_dest.mkdir()
-        (internal_dest / "should_be_excluded.txt").touch()
+        _fast_touch(internal_dest / "should_be_excluded.txt")
         
         files = file_organizer.list_files(source, recursive=True, exclude_dir=internal_dest)
         
         # التأكد من عدم وجود ملفات من المجلد المستثنى
-        assert all(internal_dest.resolve() not in f.resolve().parents and f.resolve() != internal_dest.resolve() for f in files)
+        # المسارات المعادة مبنية على source نفسه، لذا يكفي resolve() واحد ثم مقارنة نصية
+        source_res = source.resolve()
+        internal_str = str(internal_dest.resolve())
+        internal_prefix = internal_str + os.sep
+        for f in files:
+            f_abs = os.path.join(source_res, os.path.relpath(f, source))
+            assert f_abs != internal_str and not f_abs.startswith(internal_prefix)
     
     def test_special_characters_in_filename(self, safe_tmp_path):
         """اختبار أسماء ملفات بأحرف خاصة"""
@@ -899,7 +1236,7 @@ class TestEdgeCases:
         source.mkdir()
         
         special_file = source / "file with spaces & symbols!.txt"
-        special_file.touch()
+        _fast_touch(special_file)
         
         file_organizer.organize_by_type(
             special_file,
@@ -907,10 +1244,10 @@ class TestEdgeCases:
             action="move",
             conflict_policy="rename",
             dry_run=False,
-            ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+            ext_index=_DEFAULT_EXT_INDEX
         )
         
-        assert (dest / "Documents" / "file with spaces & symbols!.txt").exists()
+        _assert_has(dest / "Documents", "file with spaces & symbols!.txt")
     
     def test_unicode_filename(self, safe_tmp_path):
         """اختبار أسماء ملفات بأحرف يونيكود"""
@@ -918,7 +1255,7 @@ class TestEdgeCases:
         source.mkdir()
         
         unicode_file = source / "ملف_عربي.txt"
-        unicode_file.touch()
+        _fast_touch(unicode_file)
         
         file_organizer.organize_by_type(
             unicode_file,
@@ -926,10 +1263,10 @@ class TestEdgeCases:
             action="move",
             conflict_policy="rename",
             dry_run=False,
-            ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+            ext_index=_DEFAULT_EXT_INDEX
         )
         
-        assert (dest / "Documents" / "ملف_عربي.txt").exists()
+        _assert_has(dest / "Documents", "ملف_عربي.txt")
     
     def test_hidden_file(self, safe_tmp_path):
         """اختبار الملفات المخفية"""
@@ -937,7 +1274,7 @@ class TestEdgeCases:
         source.mkdir()
         
         hidden_file = source / ".hidden_file.txt"
-        hidden_file.touch()
+        _fast_touch(hidden_file)
         
         file_organizer.organize_by_type(
             hidden_file,
@@ -945,10 +1282,10 @@ class TestEdgeCases:
             action="move",
             conflict_policy="rename",
             dry_run=False,
-            ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+            ext_index=_DEFAULT_EXT_INDEX
         )
         
-        assert (dest / "Documents" / ".hidden_file.txt").exists()
+        _assert_has(dest / "Documents", ".hidden_file.txt")
     
     def test_file_without_extension(self, safe_tmp_path):
         """اختبار ملف بدون امتداد"""
@@ -956,7 +1293,7 @@ class TestEdgeCases:
         source.mkdir()
         
         no_ext_file = source / "README"
-        no_ext_file.touch()
+        _fast_touch(no_ext_file)
         
         file_organizer.organize_by_type(
             no_ext_file,
@@ -964,21 +1301,27 @@ class TestEdgeCases:
             action="move",
             conflict_policy="rename",
             dry_run=False,
-            ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+            ext_index=_DEFAULT_EXT_INDEX
         )
         
-        assert (dest / "Others" / "README").exists()
+        _assert_has(dest / "Others", "README")
     
     def test_very_long_filename(self, safe_tmp_path):
         """اختبار اسم ملف طويل جداً"""
         source, dest = safe_tmp_path / "source", safe_tmp_path / "dest"
         source.mkdir()
         
-        # اسم ملف طويل (200 حرف)
-        long_name = "a" * 200 + ".txt"
+        # معرفة الحد الأقصى لطول الاسم مسبقاً بدلاً من انتظار فشل الإنشاء
+        try:
+            name_max = os.pathconf(source, "PC_NAME_MAX")
+        except (OSError, ValueError, AttributeError):  # AttributeError: لا يوجد pathconf على Windows
+            name_max = 255
+        if len(_LONG_NAME) > name_max:
+            pytest.skip("نظام الملفات لا يدعم أسماء طويلة")
+        
         try:
-            long_file = source / long_name
-            long_file.touch()
+            long_file = source / _LONG_NAME
+            _fast_touch(long_file)
             
             result = file_organizer.organize_by_type(
                 long_file,
@@ -986,7 +1329,7 @@ class TestEdgeCases:
                 action="move",
                 conflict_policy="rename",
                 dry_run=False,
-                ext_index=file_organizer.build_ext_index(file_organizer.DEFAULT_CATEGORIES)
+                ext_index=_DEFAULT_EXT_INDEX
             )
             
             assert result is True
@@ -1001,14 +1344,25 @@ class TestEdgeCases:
 class TestCancelOperation:
     """اختبارات إلغاء العملية"""
     
-    def test_cancel_event_stops_processing(self, default_params):
+    def test_cancel_event_stops_processing(self, ephemeral_env):
         """اختبار أن حدث الإلغاء يوقف المعالجة"""
-        cancel_event = default_params["cancel_event"]
+        source, dest = ephemeral_env
+        cancel_event = threading.Event()
         
         # تعيين الإلغاء مباشرة
         cancel_event.set()
         
-        result = process_directory_test(**default_params)
+        result = process_directory_test(
+            source=source,
+            dest=dest,
+            mode="type",
+            action="move",
+            recursive=False,
+            conflict_policy="rename",
+            dry_run=False,
+            categories=_CATEGORIES_PROXY,
+            cancel_event=cancel_event
+        )
         
         # يجب أن يتوقف قبل معالجة كل الملفات
         assert result["processed"] < result["total"] or result["total"] == 0
@@ -1021,33 +1375,51 @@ class TestCancelOperation:
 class TestListFiles:
     """اختبارات قائمة الملفات"""
     
-    def test_list_files_non_recursive(self, test_environment):
+    def test_list_files_non_recursive(self, listed):
         """اختبار قائمة الملفات بدون العودية"""
-        source, dest = test_environment
-        
-        files = file_organizer.list_files(source, recursive=False)
+        source, files, _ = listed
         
         # يجب أن تكون ملفات المستوى الأول فقط
-        assert all(f.parent == source for f in files)
+        # المسارات المعادة مبنية على source نفسه، لذا تكفي مقارنة نصية بدون resolve() أو Path.parent
+        source_str = os.fspath(source)
+        assert all(os.path.dirname(f) == source_str for f in files)
     
-    def test_list_files_recursive(self, test_environment):
+    def test_list_files_recursive(self, listed):
         """اختبار قائمة الملفات مع العودية"""
-        source, dest = test_environment
-        
-        files = file_organizer.list_files(source, recursive=True)
+        source, _, files = listed
         
         # يجب أن تشمل الملفات في المجلدات الفرعية
-        nested_files = [f for f in files if f.parent != source]
-        assert len(nested_files) > 0
+        source_str = os.fspath(source)
+        assert any(os.path.dirname(f) != source_str for f in files)
     
-    def test_list_files_excludes_directories(self, test_environment):
+    def test_list_files_excludes_directories(self, listed):
         """اختبار استثناء المجلدات"""
-        source, dest = test_environment
+        source, _, files = listed
         
-        files = file_organizer.list_files(source, recursive=True)
+        # iter_files يعيد DirEntry: نوع المدخل معروف من قراءة المجلد بدون stat إضافي
+        entries = list(file_organizer.iter_files(source, recursive=True))
         
         # يجب أن تكون كلها ملفات وليست مجلدات
-        assert all(f.is_file() for f in files)
+        assert all(e.is_file(follow_symlinks=False) for e in entries)
+        assert sorted(e.path for e in entries) == sorted(str(f) for f in files)
+    
+    def test_list_files_symlinks(self, ephemeral_env):
+        """اختبار إدراج روابط الملفات وعدم الدخول في روابط المجلدات"""
+        source, dest = ephemeral_env
+        try:
+            (source / "link.jpg").symlink_to(source / "image.jpg")
+            (source / "broken.jpg").symlink_to(source / "missing.jpg")
+            (source / "linked_dir").symlink_to(source / "subfolder", target_is_directory=True)
+        except (OSError, NotImplementedError):
+            pytest.skip("نظام الملفات لا يدعم الروابط الرمزية")
+        
+        files = file_organizer.list_files(source, recursive=True)
+        names = [f.name for f in files]
+        
+        assert "link.jpg" in names
+        assert "broken.jpg" not in names
+        assert not any("linked_dir" in f.parts for f in files)
+        assert names.count("nested_video.mp4") == 1
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1068,7 +1440,7 @@ class TestUniquePath:
     def test_unique_path_with_conflict(self, safe_tmp_path):
         """اختبار مسار فريد مع تعارض"""
         path = safe_tmp_path / "existing.txt"
-        path.touch()
+        _fast_touch(path)
         
         result = file_organizer.unique_path(path)
         
@@ -1077,9 +1449,9 @@ class TestUniquePath:
     def test_unique_path_multiple_conflicts(self, safe_tmp_path):
         """اختبار مسار فريد مع تعارضات متعددة"""
         path = safe_tmp_path / "file.txt"
-        path.touch()
-        (safe_tmp_path / "file (1).txt").touch()
-        (safe_tmp_path / "file (2).txt").touch()
+        _fast_touch(path)
+        _fast_touch(safe_tmp_path / "file (1).txt")
+        _fast_touch(safe_tmp_path / "file (2).txt")
         
         result = file_organizer.unique_path(path)
         
@@ -1104,7 +1476,7 @@ class TestResolveConflict:
     def test_resolve_skip(self, safe_tmp_path):
         """اختبار حل بالتخطي"""
         path = safe_tmp_path / "existing.txt"
-        path.touch()
+        _fast_touch(path)
         
         result = file_organizer.resolve_conflict(path, "skip")
         
@@ -1123,7 +1495,7 @@ class TestResolveConflict:
     def test_resolve_rename(self, safe_tmp_path):
         """اختبار حل بإعادة التسمية"""
         path = safe_tmp_path / "existing.txt"
-        path.touch()
+        _fast_touch(path)
         
         result = file_organizer.resolve_conflict(path, "rename")
         
@@ -1174,31 +1546,28 @@ class TestIntegration:
         # والنسخ يجب أن تكون في الوجهة
         assert (dest / "Images" / "image.jpg").exists()
     
-    def test_all_modes(self, safe_tmp_path):
-        """اختبار جميع أوضاع التنظيم"""
-        modes = ["type", "name", "date", "day", "size", "first_letter"]
+    @pytest.mark.parametrize("mode", ["type", "name", "date", "day", "size", "first_letter"])
+    def test_all_modes(self, safe_tmp_path, proto_source, mode):
+        """اختبار جميع أوضاع التنظيم (كل وضع حالة مستقلة يمكن توزيعها بـ pytest -n)"""
+        source = safe_tmp_path / f"source_{mode}"
+        dest = safe_tmp_path / f"dest_{mode}"
+        source.mkdir()
+        _link_or_copy(proto_source / "test.txt", source / "test.txt")
         
-        for mode in modes:
-            source = safe_tmp_path / f"source_{mode}"
-            dest = safe_tmp_path / f"dest_{mode}"
-            source.mkdir()
-            
-            test_file = source / "test.txt"
-            test_file.write_text("test content")
-            
-            result = process_directory_test(
-                source=source,
-                dest=dest,
-                mode=mode,
-                action="copy",
-                recursive=False,
-                conflict_policy="rename",
-                dry_run=False,
-                categories=file_organizer.DEFAULT_CATEGORIES,
-                cancel_event=threading.Event()
-            )
-            
-            assert result["succeeded"] == 1, f"Mode {mode} failed"
+        result = process_directory_test(
+            source=source,
+            dest=dest,
+            mode=mode,
+            action="copy",
+            recursive=False,
+            conflict_policy="rename",
+            dry_run=False,
+            categories=file_organizer.DEFAULT_CATEGORIES,
+            ext_index=_DEFAULT_EXT_INDEX,
+            cancel_event=_NEVER_CANCEL
+        )
+        
+        assert result["succeeded"] == 1, f"Mode {mode} failed"
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1208,39 +1577,38 @@ class TestIntegration:
 class TestErrorHandling:
     """اختبارات معالجة الأخطاء"""
     
-    def test_invalid_mode(self, default_params):
-        """اختبار وضع غير صالح"""
-        default_params["mode"] = "invalid_mode"
-        
-        result = process_directory_test(**default_params)
+    @pytest.mark.parametrize("override", [
+        lambda p: {**p, "mode": "invalid_mode"},
+        lambda p: {**p, "source": p["source"].parent / "missing"},
+    ], ids=["invalid_mode", "nonexistent_source"])
+    def test_invalid_input(self, safe_tmp_path, override):
+        """اختبار مدخلات غير صالحة (وضع غير صالح أو مصدر غير موجود)"""
+        # الخطأ يُكتشف قبل قراءة المصدر، لذا يكفي مجلد فارغ بدلاً من نسخ شجرة الاختبار
+        source = safe_tmp_path / "source"
+        source.mkdir()
+        params = override({
+            "source": source,
+            "dest": safe_tmp_path / "dest",
+            "mode": "type",
+            "action": "move",
+            "recursive": False,
+            "conflict_policy": "rename",
+            "dry_run": False,
+            "categories": _CATEGORIES_PROXY,
+            "cancel_event": _NEVER_CANCEL
+        })
+        
+        result = process_directory_test(**params)
         
         assert "error" in result
     
     def test_invalid_conflict_policy(self, safe_tmp_path):
         """اختبار سياسة تعارض غير صالحة"""
         path = safe_tmp_path / "test.txt"
-        path.touch()
+        _fast_touch(path)
         
         with pytest.raises(ValueError):
             file_organizer.resolve_conflict(path, "invalid_policy")
-    
-    def test_process_nonexistent_source(self, safe_tmp_path):
-        """اختبار معالجة مصدر غير موجود"""
-        source = safe_tmp_path / "nonexistent"
-        dest = safe_tmp_path / "dest"
-        
-        result = process_directory_test(
-            source=source,
-            dest=dest,
-            mode="type",
-            action="move",
-            recursive=False,
-            conflict_policy="rename",
-            dry_run=False,
-            cancel_event=threading.Event()
-        )
-        
-        assert "error" in result
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1263,6 +1631,23 @@ class TestDoTransfer:
         assert dest_file.exists()
         assert dest_file.read_text() == "content"
     
+    def test_do_transfer_move_cross_device(self, safe_tmp_path, monkeypatch):
+        """اختبار النقل بين أجهزة مختلفة (نسخ ثم حذف)"""
+        source_file = safe_tmp_path / "source.txt"
+        source_file.write_text("content")
+        dest_file = safe_tmp_path / "dest" / "dest.txt"
+        
+        def fail_exdev(src, dst):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        
+        monkeypatch.setattr(file_organizer.os, "replace", fail_exdev)
+        
+        result = file_organizer.do_transfer(source_file, dest_file, "move", dry_run=False)
+        
+        assert result is True
+        assert not source_file.exists()
+        assert dest_file.read_text() == "content"
+
     def test_do_transfer_copy(self, safe_tmp_path):
         """اختبار نسخ ملف"""
         source_file = safe_tmp_path / "source.txt"
@@ -1275,19 +1660,123 @@ class TestDoTransfer:
         assert source_file.exists()
         assert dest_file.exists()
     
-    def test_do_transfer_dry_run(self, safe_tmp_path, caplog):
+    def test_do_transfer_creates_dir_once(self, safe_tmp_path, monkeypatch):
+        """اختبار إنشاء مجلد الوجهة مرة واحدة فقط عند استخدام الذاكرة"""
+        dest_cache = file_organizer.DestinationCache()
+        calls = []
+        real_makedirs = os.makedirs
+        
+        def counting_makedirs(path, *args, **kwargs):
+            calls.append(path)
+            return real_makedirs(path, *args, **kwargs)
+        
+        monkeypatch.setattr(file_organizer.os, "makedirs", counting_makedirs)
+        
+        for i in range(3):
+            source_file = safe_tmp_path / f"source{i}.txt"
+            source_file.write_text("content")
+            dest_file = safe_tmp_path / "dest" / f"dest{i}.txt"
+            assert file_organizer.do_transfer(source_file, dest_file, "copy", dry_run=False,
+                                              dest_cache=dest_cache)
+        
+        assert calls == [str(safe_tmp_path / "dest")]
+    
+    def test_do_transfer_copy_preserves_metadata(self, safe_tmp_path):
+        """اختبار أن النسخ يحافظ على المحتوى والتوقيت والصلاحيات"""
+        source_file = safe_tmp_path / "source.bin"
+        source_file.write_bytes(os.urandom(3 * 1024 * 1024))
+        m_time = datetime.datetime(2022, 3, 4).timestamp()
+        os.utime(source_file, (m_time, m_time))
+        os.chmod(source_file, 0o640)
+        dest_file = safe_tmp_path / "dest" / "dest.bin"
+        
+        result = file_organizer.do_transfer(source_file, dest_file, "copy", dry_run=False)
+        
+        assert result is True
+        assert dest_file.read_bytes() == source_file.read_bytes()
+        assert dest_file.stat().st_mtime == source_file.stat().st_mtime
+        assert dest_file.stat().st_mode == source_file.stat().st_mode
+    
+    @pytest.mark.skipif(not file_organizer._USE_SENDFILE, reason="sendfile متاح على Linux فقط")
+    def test_do_transfer_copy_uses_sendfile(self, safe_tmp_path, monkeypatch):
+        """اختبار أن النسخ يتم داخل النواة عبر sendfile دون المرور بذاكرة Python"""
+        source_file = safe_tmp_path / "source.bin"
+        source_file.write_bytes(os.urandom(1024 * 1024))
+        dest_file = safe_tmp_path / "dest" / "dest.bin"
+        calls = []
+        real_sendfile = os.sendfile
+        
+        def counting_sendfile(*args):
+            calls.append(args)
+            return real_sendfile(*args)
+        
+        # تعطيل reflink حتى يُجرَّب مسار sendfile على أي نظام ملفات
+        monkeypatch.setattr(file_organizer, "_try_reflink", lambda src_fd, dst_fd: False)
+        monkeypatch.setattr(file_organizer.os, "sendfile", counting_sendfile)
+        
+        result = file_organizer.do_transfer(source_file, dest_file, "copy", dry_run=False)
+        
+        assert result is True
+        assert calls
+        assert dest_file.read_bytes() == source_file.read_bytes()
+    
+    @pytest.mark.skipif(not file_organizer._USE_SENDFILE or file_organizer.fcntl is None,
+                        reason="FICLONE متاح على Linux فقط")
+    @pytest.mark.parametrize("reflink_ok", [True, False], ids=["reflinked", "eopnotsupp"])
+    def test_do_transfer_copy_tries_reflink_first(self, safe_tmp_path, monkeypatch, reflink_ok):
+        """اختبار أن النسخ يجرب FICLONE أولاً ويعود إلى sendfile عند عدم دعمه"""
+        source_file = safe_tmp_path / "source.bin"
+        source_file.write_bytes(os.urandom(64 * 1024))
+        dest_file = safe_tmp_path / "dest" / "dest.bin"
+        ioctl_calls = []
+        sendfile_calls = []
+        real_sendfile = os.sendfile
+        
+        def fake_ioctl(fd, request, arg):
+            # الترتيب المطلوب: (وصف الوجهة، FICLONE، وصف المصدر)
+            ioctl_calls.append((os.fstat(fd).st_ino, request, os.fstat(arg).st_ino))
+            if not reflink_ok:
+                raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+            # محاكاة مشاركة الكتل بنسخ البيانات مباشرة
+            os.write(fd, os.pread(arg, os.fstat(arg).st_size, 0))
+            return 0
+        
+        def counting_sendfile(*args):
+            sendfile_calls.append(args)
+            return real_sendfile(*args)
+        
+        monkeypatch.setattr(file_organizer.fcntl, "ioctl", fake_ioctl)
+        monkeypatch.setattr(file_organizer.os, "sendfile", counting_sendfile)
+        
+        result = file_organizer.do_transfer(source_file, dest_file, "copy", dry_run=False)
+        
+        assert result is True
+        assert ioctl_calls == [(dest_file.stat().st_ino, file_organizer._FICLONE, source_file.stat().st_ino)]
+        assert bool(sendfile_calls) is not reflink_ok
+        assert dest_file.read_bytes() == source_file.read_bytes()
+    
+    def test_do_transfer_dry_run(self, safe_tmp_path, monkeypatch, caplog):
         """اختبار المحاكاة"""
         source_file = safe_tmp_path / "source.txt"
         source_file.write_text("content")
         dest_file = safe_tmp_path / "dest" / "dest.txt"
         
-        with caplog.at_level(logging.INFO):
+        with caplog.at_level(logging.INFO, logger=file_organizer.logger.name):
             result = file_organizer.do_transfer(source_file, dest_file, "move", dry_run=True)
         
         assert result is True
         assert source_file.exists()  # لم يُنقل فعلياً
         assert not dest_file.exists()
         assert "[DRY-RUN]" in caplog.text
+        
+        # عند إيقاف INFO لا تُنسَّق رسالة المحاكاة أصلاً
+        info_calls = []
+        monkeypatch.setattr(file_organizer.logger, "level", logging.WARNING)
+        monkeypatch.setattr(file_organizer.logger, "_cache", {})
+        monkeypatch.setattr(file_organizer.logger, "info", lambda *args, **kwargs: info_calls.append(args))
+        
+        assert file_organizer.do_transfer(source_file, dest_file, "move", dry_run=True) is True
+        assert info_calls == []
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1301,8 +1790,6 @@ class TestLogUndoOperation:
         """اختبار إنشاء ملف السجل"""
         src = safe_tmp_path / "src.txt"
         dst = safe_tmp_path / "dst.txt"
-        src.touch()
-        dst.touch()
         
         file_organizer.log_undo_operation("move", src, dst)
         
@@ -1312,15 +1799,30 @@ class TestLogUndoOperation:
         """اختبار محتوى ملف السجل"""
         src = safe_tmp_path / "src.txt"
         dst = safe_tmp_path / "dst.txt"
-        src.touch()
-        dst.touch()
         
         file_organizer.log_undo_operation("move", src, dst)
+        file_organizer.flush_undo_log()
+        
+        content = file_organizer.UNDO_LOG_FILE.read_bytes()
+        assert content.startswith(b"MOVE|")
+        assert os.fsencode(src.resolve()) in content
+        assert os.fsencode(dst.resolve()) in content
+    
+    def test_undo_log_writer_buffers_until_close(self, safe_tmp_path):
+        """اختبار كاتب السجل المفتوح طوال العملية"""
+        src = safe_tmp_path / "src.txt"
+        dst = safe_tmp_path / "dst.txt"
+        
+        undo_log = file_organizer.UndoLog()
+        # لا يُنشأ الملف قبل أول عملية
+        assert not file_organizer.UNDO_LOG_FILE.exists()
+        
+        with undo_log:
+            file_organizer.log_undo_operation("copy", src, dst, undo_log)
+            assert undo_log.last_destination == str(dst.resolve())
         
-        content = file_organizer.UNDO_LOG_FILE.read_text(encoding='utf-8')
-        assert "MOVE" in content
-        assert str(src.resolve()) in content
-        assert str(dst.resolve()) in content
+        lines = file_organizer.UNDO_LOG_FILE.read_text(encoding='utf-8').splitlines()
+        assert lines == [f"COPY|{src.resolve()}|{dst.resolve()}"]
 
 
 if __name__ == "__main__":